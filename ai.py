@@ -1,114 +1,594 @@
 # General Imports
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import Any, Callable, Literal, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import os
+import threading
+import time
 import re
 import json
 
 # App Imports
 import common as common
+import metrics as metrics
 
-# OpenAI Client Initialization
-client = OpenAI(
-        organization=common.OPENAI_ORGANIZATION_ID,
-        project=common.OPENAI_PROJECT_ID,
-        api_key=common.OPENAI_API_KEY)
+LLM_MODEL = "gpt-4o-mini"
+
+
+# OpenAI Client
+class AsyncLLMClient:
+    """
+    Runs all the LLM calls of the process on one asyncio event loop in a background thread,
+    through a single AsyncOpenAI client (one pooled HTTP connection pool), with at most
+    `max_concurrency` requests in flight and a timeout per request.
+
+    Callers stay synchronous: call() submits the request to the loop and waits for its result,
+    so the threads of a worker (task threads, map-reduce chunks) share the pool and the limit.
+    The loop is started on first use, after Celery has forked its worker processes.
+    """
+
+    def __init__(self, base_url: Optional[str] = common.LLM_BASE_URL,
+                 max_concurrency: int = common.LLM_MAX_CONCURRENCY,
+                 timeout: float = common.LLM_REQUEST_TIMEOUT, max_retries: int = common.LLM_MAX_RETRIES):
+        self.base_url = base_url
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_started(self):
+        # A forked child inherits the loop object but not its thread: start a new one
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='llm-event-loop', daemon=True).start()
+            self._client = AsyncOpenAI(
+                organization=common.OPENAI_ORGANIZATION_ID,
+                project=common.OPENAI_PROJECT_ID,
+                api_key=common.OPENAI_API_KEY,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self._pid = os.getpid()
+
+    async def _request(self, method: str, kwargs: dict):
+        async with self._semaphore:
+            return await getattr(self._client.responses, method)(**kwargs)
+
+    def call(self, method: str, **kwargs):
+        """
+        Calls `client.responses.<method>` (create or parse) on the event loop and waits for the response.
+        ARGS:
+            method (str): Method of the Responses API.
+            kwargs: Arguments of the request; `timeout` overrides the client timeout for this request.
+        RETURNS:
+            The response of the API.
+        """
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._request(method, kwargs), self._loop).result()
+
+
+llm_client = AsyncLLMClient()
+
+
+# LLM Response Cache
+class LLMResponseCache:
+    """
+    Bounded in-process LRU cache of LLM answers with TTL expiry and hit/miss counters.
+    Keys are hashes of everything that determines the answer (see llm_cache_key).
+    """
+
+    def __init__(self, max_size: int = common.LLM_CACHE_SIZE, ttl: int = common.LLM_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Returns (found, value) and counts the lookup as a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+llm_cache = LLMResponseCache()
+
+
+def llm_cache_key(model: str, instructions: str, content: str, user_query: Optional[str] = None,
+                  output_format: Optional[str] = None) -> str:
+    """
+    Builds the cache key of an LLM call from the model, the instructions, the page content,
+    the user query and the requested output format.
+    """
+    digest = hashlib.sha256()
+    for part in (model, instructions, content, user_query, output_format):
+        # Length prefix keeps ("ab", "c") and ("a", "bc") from colliding
+        encoded = ('' if part is None else str(part)).encode('utf-8')
+        digest.update(f"{len(encoded)}:".encode('utf-8'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def cached_llm_call(key: str, call: Callable[[], tuple]) -> tuple[Any, dict]:
+    """
+    Returns the cached answer for `key`, or runs `call` and caches its answer.
+    `call` returns a tuple of (answer, meta) describing how the answer was produced.
+    RETURNS:
+        Tuple of (answer, meta) where meta says whether the answer came from the cache.
+    """
+    if common.LLM_CACHE_ENABLED:
+        found, answer = llm_cache.get(key)
+        if found:
+            metrics.LLM_CACHE_LOOKUPS.labels(result='hit').inc()
+            return answer, {'llm_cache': 'hit'}
+        metrics.LLM_CACHE_LOOKUPS.labels(result='miss').inc()
+
+    answer, meta = call()
+
+    if common.LLM_CACHE_ENABLED:
+        llm_cache.set(key, answer)
+    return answer, dict(meta, llm_cache='miss')
+
+
+# Token Budgeting And Map-Reduce For Large Pages
+_token_encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns the number of tokens of `text`, counted with tiktoken when it is installed
+    and estimated at 4 characters per token otherwise.
+    """
+    global _token_encoding
+    if _token_encoding is None:
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _token_encoding = False
+    if _token_encoding:
+        return len(_token_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+# Structural boundaries to split content on, from the coarsest to the finest
+# (HTML tags for the cleaned HTML format, line structure for the Markdown format)
+CHUNK_BOUNDARY_PATTERNS = [
+    re.compile(r'(?=<h[1-6][\s>])|(?=^#{1,6} )', re.MULTILINE),
+    re.compile(r'(?<=</li>)|(?<=</p>)|(?<=</pre>)|(?<=</blockquote>)|(?<=</ul>)|(?<=</ol>)|(?<=\n\n)'),
+    re.compile(r'(?<=</div>)|(?<=</span>)|(?<=</a>)|(?<=</code>)|(?<=\n)'),
+]
+
+
+def split_content_into_chunks(content: str, max_tokens: int) -> list:
+    """
+    Splits page content (cleaned HTML or Markdown) into chunks of at most `max_tokens` tokens
+    along structural boundaries: before headings first, then after list items and paragraphs,
+    then after inline elements or lines. Only text without any boundary left is cut at arbitrary positions.
+    ARGS:
+        content (str): The cleaned content of the web page.
+        max_tokens (int): Token budget of a chunk.
+    RETURNS:
+        list: The chunks, in page order.
+    """
+    def split(text, level):
+        if estimate_tokens(text) <= max_tokens:
+            return [text]
+        if level == len(CHUNK_BOUNDARY_PATTERNS):
+            size = max_tokens * 4
+            return [text[i:i + size] for i in range(0, len(text), size)]
+        pieces = [piece for piece in CHUNK_BOUNDARY_PATTERNS[level].split(text) if piece]
+        return [part for piece in pieces for part in split(piece, level + 1)]
+
+    # Pack consecutive pieces back together so that chunks are as large as the budget allows
+    chunks = []
+    current, current_tokens = [], 0
+    for piece in split(content, 0):
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append(''.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def create_response(instructions: str, query: str, operation: str = 'single', text: Optional[dict] = None):
+    """
+    Calls the Responses API and measures the call.
+    ARGS:
+        operation (str): Step of the answer the call is made for (single, map or reduce), used as a metric label.
+        text (dict): Optional text configuration of the request, e.g. a structured output format (see output_text_format).
+    RETURNS:
+        Tuple of (response, stats) where stats holds the duration and the token usage of the call.
+    """
+    start = time.monotonic()
+    response = llm_client.call(
+        'create',
+        model=LLM_MODEL,
+        instructions=instructions,
+        input=query,
+        **({'text': text} if text is not None else {}),
+    )
+    usage = getattr(response, 'usage', None)
+    stats = {
+        'elapsed': round(time.monotonic() - start, 3),
+        'input_tokens': getattr(usage, 'input_tokens', None),
+        'output_tokens': getattr(usage, 'output_tokens', None),
+    }
+    metrics.observe_llm_call(LLM_MODEL, operation, **stats)
+    return response, stats
+
+
+def map_reduce(chunks: list, map_chunk: Callable[[str], tuple], reduce_answers: Callable[[list], tuple]) -> tuple:
+    """
+    Runs `map_chunk` on every chunk concurrently (at most LLM_MAP_CONCURRENCY calls at once),
+    then combines the partial answers with `reduce_answers`.
+    Both callables return (answer, stats) like create_response.
+    RETURNS:
+        Tuple of (final answer, meta) where meta records per-chunk and reduce timings and token counts.
+    """
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=min(common.LLM_MAP_CONCURRENCY, len(chunks))) as executor:
+        results = list(executor.map(map_chunk, chunks))
+
+    chunk_stats = [
+        dict(stats, index=index, estimated_tokens=estimate_tokens(chunk))
+        for index, (chunk, (_, stats)) in enumerate(zip(chunks, results))
+    ]
+    answer, reduce_stats = reduce_answers([partial for partial, _ in results])
+
+    meta = {
+        'mode': 'map_reduce',
+        'chunks': chunk_stats,
+        'reduce': reduce_stats,
+        'elapsed': round(time.monotonic() - start, 3),
+    }
+    return answer, meta
+
+
+# Structured Outputs For Custom JSON Formats
+# Type names accepted as values of an output_format, any other value is an example of a string
+OUTPUT_FORMAT_TYPE_NAMES = {
+    'string': 'string', 'str': 'string', 'text': 'string',
+    'number': 'number', 'float': 'number',
+    'integer': 'integer', 'int': 'integer',
+    'boolean': 'boolean', 'bool': 'boolean',
+}
+JSON_SCHEMA_PYTHON_TYPES = {'string': str, 'number': (int, float), 'integer': int, 'boolean': bool}
+
+# Limits of the structured outputs of the Responses API
+OUTPUT_SCHEMA_MAX_DEPTH = 10
+OUTPUT_SCHEMA_MAX_PROPERTIES = 5000
+OUTPUT_SCHEMA_CACHE_SIZE = 256
+
+_output_schemas = OrderedDict()  # schema hash -> compiled output format
+_output_schemas_lock = threading.Lock()
+
+
+def compile_output_format(output_format: str) -> dict:
+    """
+    Compiles an output_format (a JSON example of the answer whose values are type names such as
+    "string" or "number", example values, nested objects or one-item lists) into the strict JSON Schema
+    of a structured output, and into the key_types common.is_valid_json checks the answer with.
+    Every leaf is nullable so that the model can answer null when the page does not say.
+    Compiled formats are cached by the hash of their canonical JSON.
+    ARGS:
+        output_format (str): The JSON format requested by the user.
+    RETURNS:
+        dict with the schema, the key_types and the schema hash.
+    RAISES:
+        ValueError: If the format is not a JSON object or exceeds the limits of structured outputs.
+    """
+    is_valid, error_msg = common.is_valid_json(output_format, strict=True)
+    if not is_valid:
+        raise ValueError(error_msg)
+    canonical = json.dumps(json.loads(output_format), sort_keys=True, separators=(',', ':'))
+    schema_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    with _output_schemas_lock:
+        if schema_hash in _output_schemas:
+            _output_schemas.move_to_end(schema_hash)
+            return _output_schemas[schema_hash]
+
+    property_count = 0
+
+    def compile_value(value, depth):
+        nonlocal property_count
+        if isinstance(value, dict):
+            if not value and depth == 1:
+                raise ValueError("output_format must have at least one key")
+            if depth > OUTPUT_SCHEMA_MAX_DEPTH:
+                raise ValueError(f"output_format is nested more than {OUTPUT_SCHEMA_MAX_DEPTH} levels deep")
+            property_count += len(value)
+            if property_count > OUTPUT_SCHEMA_MAX_PROPERTIES:
+                raise ValueError(f"output_format has more than {OUTPUT_SCHEMA_MAX_PROPERTIES} keys")
+            compiled = {key: compile_value(item, depth + 1) for key, item in value.items()}
+            schema = {
+                'type': 'object',
+                'properties': {key: item_schema for key, (item_schema, _) in compiled.items()},
+                'required': list(compiled),
+                'additionalProperties': False,
+            }
+            return schema, {key: item_types for key, (_, item_types) in compiled.items()}
+
+        if isinstance(value, list):
+            item_schema, item_types = compile_value(value[0] if value else 'string', depth + 1)
+            return {'type': 'array', 'items': item_schema}, [item_types]
+
+        description = None
+        if isinstance(value, bool):
+            json_type = 'boolean'
+        elif isinstance(value, int):
+            json_type = 'integer'
+        elif isinstance(value, float):
+            json_type = 'number'
+        elif isinstance(value, str) and value.strip().lower() in OUTPUT_FORMAT_TYPE_NAMES:
+            json_type = OUTPUT_FORMAT_TYPE_NAMES[value.strip().lower()]
+        else:
+            # An example value (or null) stands for a string, described by the example
+            json_type = 'string'
+            example = '' if value is None else str(value).strip()
+            # Keep descriptions already written as an example ("e.g. Paris") as they are
+            if example:
+                description = example if example.lower().startswith('e.g.') else f"e.g. {example}"
+
+        schema = {'type': [json_type, 'null']}
+        if description:
+            schema['description'] = description
+        return schema, (JSON_SCHEMA_PYTHON_TYPES[json_type], type(None))
+
+    schema, key_types = compile_value(json.loads(output_format), 1)
+    compiled = {'schema': schema, 'key_types': key_types, 'hash': schema_hash}
+
+    with _output_schemas_lock:
+        _output_schemas[schema_hash] = compiled
+        while len(_output_schemas) > OUTPUT_SCHEMA_CACHE_SIZE:
+            _output_schemas.popitem(last=False)
+    return compiled
+
+
+def output_text_format(compiled: dict) -> dict:
+    """Text configuration of a Responses API request constraining the answer to a compiled output format."""
+    return {'format': {'type': 'json_schema', 'name': 'custom_answer', 'schema': compiled['schema'], 'strict': True}}
+
+
+def parse_structured_answer(response, compiled: dict):
+    """
+    Reads the JSON answer of a structured output request and checks it against the compiled output format.
+    RAISES:
+        ValueError: If the model refused or the answer does not match the format.
+    """
+    if not response.output_text:
+        raise ValueError("The model returned no answer (refusal or truncated output)")
+    answer = json.loads(response.output_text)
+    is_valid, error_msg = common.is_valid_json(
+        answer, required_keys=list(compiled['key_types']), key_types=compiled['key_types'], strict=True)
+    if not is_valid:
+        raise ValueError(f"Answer does not match output_format - {error_msg}")
+    return answer
+
+
+# Prompts used when a page is answered chunk by chunk
+NOT_FOUND_ANSWER = "NOT_FOUND"
+NO_ANSWER_FOUND_MESSAGE = "The page does not contain information answering this query."
+
+CHUNK_ANSWER_INSTRUCTIONS = f"""
+    You are an expert web content analyzer and reader.
+    You are given one part of the content of a web page, not the whole page.
+    Answer the user's query using only this part. If this part does not contain
+    information relevant to the query, answer exactly {NOT_FOUND_ANSWER}.
+    Do not add any additional text outside the answer.
+"""
+
+REDUCE_ANSWER_INSTRUCTIONS = """
+    You are an expert web content analyzer and reader.
+    You are given partial answers to the user's query, each one extracted from a different
+    part of the same web page. Combine them into one final answer to the user's query.
+    Do not add any additional text outside the answer. Avoid fluff like good question, smart query, etc.
+    Start directly with the answer.
+"""
+
+CHUNK_JSON_INSTRUCTIONS = """
+    You are an expert web content analyzer and reader.
+    You are given one part of the content of a web page, not the whole page.
+    Answer the user's query in the required JSON format using only this part.
+    Use null for values this part does not contain.
+"""
+
+REDUCE_JSON_INSTRUCTIONS = """
+    You are an expert web content analyzer and reader.
+    You are given partial JSON answers to the user's query, each one extracted from a different
+    part of the same web page. Merge them into one JSON object in the required JSON format,
+    combining lists and preferring non-null values.
+"""
 
 
 # AI Related Functions
-def get_answer_from_page(html_content: str, user_query: str) -> str:
+def get_answer_from_page(html_content: str, user_query: str, with_meta: bool = False):
     """
     This function used OPEN AI Responses API and takes HTML content of a web page and a user query,
     and returns a concise answer for the user query.
     ARGS:
-        html_content (str): The HTML content of the web page.
+        html_content (str): The cleaned content of the web page (HTML or Markdown).
         user_query (str): The user's question about the web page.
+        with_meta (bool): If True, also return a dict with cache, timing and token usage information.
     RETURNS:
         str: A concise answer to the user's query based on the provided web page HTML.
     """
 
     instructions = """
         You are an expert web content analyzer and reader.
-        I want you to read all the content in the provided HTML content and then answer the user's query
+        I want you to read all the content in the provided web page content and then answer the user's query
         based on that content.
         Do not add any additional text outside the answer. Avoid fluff like good question, smart query, etc.
         Start directly with the answer.
     """
 
     query = f"""
-        Here is the HTML content of the web page:
+        Here is the content of the web page:
         {html_content}
 
         The user query is:
         {user_query}
         """
 
-    response = client.responses.create(
-        model="gpt-4o-mini",
-        instructions=instructions,
-        input=query,
-    )
+    def call():
+        if estimate_tokens(html_content) <= common.LLM_SINGLE_CALL_MAX_TOKENS:
+            response, stats = create_response(instructions, query)
+            return response.output_text.strip(), dict(stats, mode='single')
 
-    answer = response.output_text.strip()
+        # Page too large for one prompt: answer from each chunk, then merge the partial answers
+        def map_chunk(chunk):
+            response, stats = create_response(CHUNK_ANSWER_INSTRUCTIONS, operation='map', query=f"""
+                Here is one part of the content of the web page:
+                {chunk}
 
+                The user query is:
+                {user_query}
+                """)
+            return response.output_text.strip(), stats
+
+        def reduce_answers(partial_answers):
+            found = [answer for answer in partial_answers if answer and answer != NOT_FOUND_ANSWER]
+            if len(found) <= 1:
+                return (found[0] if found else NO_ANSWER_FOUND_MESSAGE), None
+            partials = "\n\n".join(f"Part {index + 1}:\n{answer}" for index, answer in enumerate(found))
+            response, stats = create_response(REDUCE_ANSWER_INSTRUCTIONS, operation='reduce', query=f"""
+                Here are the partial answers:
+                {partials}
+
+                The user query is:
+                {user_query}
+                """)
+            return response.output_text.strip(), stats
+
+        chunks = split_content_into_chunks(html_content, common.LLM_CHUNK_TOKENS)
+        return map_reduce(chunks, map_chunk, reduce_answers)
+
+    key = llm_cache_key(LLM_MODEL, instructions, html_content, user_query)
+    answer, meta = cached_llm_call(key, call)
+
+    if with_meta:
+        return answer, meta
     return answer
 
 
-def return_custom_page_content(html_content: str, user_query: str, output_format: str) -> str:
+def return_custom_page_content(html_content: str, user_query: str, output_format: str, with_meta: bool = False):
     """
     This function used OPEN AI Responses API and takes HTML content of a web page and a user query,
     and returns a concise answer in a predefined JSON format.
     ARGS:
-        html_content (str): The HTML content of the web page.
+        html_content (str): The cleaned content of the web page (HTML or Markdown).
         user_query (str): The user's question about the web page.
-        json_format (str): The desired JSON format for the response.
+        output_format (str): The desired JSON format for the response, enforced as a structured output
+            (see compile_output_format).
+        with_meta (bool): If True, also return a dict with cache, timing and token usage information.
     RETURNS:
-        str: A concise answer to the user's query in the specified JSON format.
+        dict: A concise answer to the user's query in the specified JSON format.
     """
+    compiled = compile_output_format(output_format)
+    text_format = output_text_format(compiled)
 
     instructions = """
         You are an expert web content analyzer and reader.
-        I want you to read all the content in the provided HTML content and then answer the user's query
-        based on that content. Your answer must be concise and strictly follow the JSON format provided.
-        Do not add any additional text outside the JSON structure. But do not put the JSON inside markdown code fences.
-        I mean, do not use ```json ... ``` around your answer. Start directly with the JSON object.
+        I want you to read all the content in the provided web page content and then answer the user's query
+        based on that content. Your answer must be concise and fill the required JSON format.
+        Use null for values the page does not contain.
     """
 
     query = f"""
-        Here is the HTML content of the web page:
+        Here is the content of the web page:
         {html_content}
 
         The user query is:
         {user_query}
-
-        Your answer must strictly be in the following JSON format:
-        {output_format}
         """
 
-    response = client.responses.create(
-        model="gpt-4o-mini",
-        instructions=instructions,
-        input=query,
-    )
+    def call():
+        if estimate_tokens(html_content) <= common.LLM_SINGLE_CALL_MAX_TOKENS:
+            response, stats = create_response(instructions, query, text=text_format)
+            return parse_structured_answer(response, compiled), dict(stats, mode='single', schema_hash=compiled['hash'])
+
+        # Page too large for one prompt: fill the format from each chunk, then merge the objects
+        def map_chunk(chunk):
+            response, stats = create_response(CHUNK_JSON_INSTRUCTIONS, operation='map', text=text_format, query=f"""
+                Here is one part of the content of the web page:
+                {chunk}
+
+                The user query is:
+                {user_query}
+                """)
+            return parse_structured_answer(response, compiled), stats
 
-    answer = response.output_text.strip()
+        def reduce_answers(partial_answers):
+            if len(partial_answers) == 1:
+                return partial_answers[0], None
+            partials = "\n\n".join(json.dumps(answer) for answer in partial_answers)
+            response, stats = create_response(REDUCE_JSON_INSTRUCTIONS, operation='reduce', text=text_format, query=f"""
+                Here are the partial JSON objects:
+                {partials}
 
-    # Remove markdown code fences like ```json ... ```
-    answer = re.sub(r"^```json|```$", "", answer, flags=re.IGNORECASE).strip()
+                The user query is:
+                {user_query}
+                """)
+            return parse_structured_answer(response, compiled), stats
 
-    # Replace single quotes with double quotes (quick patch, works for simple JSON)
-    answer = answer.replace("'", '"')
+        chunks = split_content_into_chunks(html_content, common.LLM_CHUNK_TOKENS)
+        answer, meta = map_reduce(chunks, map_chunk, reduce_answers)
+        return answer, dict(meta, schema_hash=compiled['hash'])
 
-    json_answer = json.loads(answer)
+    key = llm_cache_key(LLM_MODEL, instructions, html_content, user_query, output_format)
+    json_answer, meta = cached_llm_call(key, call)
 
+    if with_meta:
+        return json_answer, meta
     return json_answer
 
-def describe_web_page_content(html_content: str) -> str:
+def describe_web_page_content(html_content: str, with_meta: bool = False):
     """
     Analyze and describe the content of a web page given its HTML content.
     Returns a summary and classification of the page type.
     ARGS:
-        html_content (str): The HTML content of the web page to analyze.
+        html_content (str): The cleaned content of the web page to analyze (HTML or Markdown).
+        with_meta (bool): If True, also return a dict with cache, timing and token usage information.
     RETURNS:
         ContentDescription: An object containing the summary and type of the web page
     """
@@ -129,24 +609,35 @@ def describe_web_page_content(html_content: str) -> str:
 
     instructions = """
         You are an expert web content analyzer.
-        Given the HTML content of a web page, you will provide a concise summary
+        Given the content of a web page, you will provide a concise summary
         of its content and classify the page into one of the specified types:
         Blog, News Article, Product Page, Landing Page, Documentation, Tutorial, Job Board, Forum, or Other
     """
 
     query = f"""
-        Here is the HTML content of the web page:
+        Here is the content of the web page:
         {html_content}
         """
-    response = client.responses.parse(
-        model="gpt-4o-mini",
-        instructions=instructions,
-        input=query,
-        ext_format=ContentDescription
-    )
+    def call():
+        start = time.monotonic()
+        response = llm_client.call(
+            'parse',
+            model=LLM_MODEL,
+            instructions=instructions,
+            input=query,
+            text_format=ContentDescription
+        )
+        elapsed = round(time.monotonic() - start, 3)
+        usage = getattr(response, 'usage', None)
+        metrics.observe_llm_call(LLM_MODEL, 'describe', elapsed, getattr(usage, 'input_tokens', None),
+                                 getattr(usage, 'output_tokens', None))
+        return response.output_parsed, {'mode': 'single', 'elapsed': elapsed}
 
-    page_description = response.output_parsed
+    key = llm_cache_key(LLM_MODEL, instructions, html_content)
+    page_description, meta = cached_llm_call(key, call)
 
+    if with_meta:
+        return page_description, meta
     return page_description
 
 
@@ -0,0 +1,53 @@
+"""
+Benchmark of the browser request blocking profiles (common.BLOCK_PROFILES).
+
+Renders each URL in a pooled Chrome driver once per profile and reports the page
+load time and the bytes transferred, with the time saved and bytes avoided compared
+to the 'none' profile. Needs Chrome and network access.
+
+Usage:
+    python benchmarks/bench_block_profiles.py https://example.com https://example.org [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common as common
+
+
+def render(url, profile):
+    page_source, meta = common.fetch_page_browser(url, block_profile=profile)
+    network = meta.get('network') or {}
+    return meta['load_time'], network.get('transferred_bytes', 0), network.get('blocked', 0)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('urls', nargs='+')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--profiles', default=','.join(common.BLOCK_PROFILES))
+    args = arg_parser.parse_args()
+
+    profiles = args.profiles.split(',')
+    print(f"{'url':<40} {'profile':<10} {'load':>8} {'KB':>8} {'blocked':>8} {'time saved':>11} {'KB avoided':>11}")
+    try:
+        for url in args.urls:
+            baseline = None
+            for profile in profiles:
+                runs = [render(url, profile) for _ in range(args.repeat)]
+                load_time = statistics.median(run[0] for run in runs)
+                transferred = statistics.median(run[1] for run in runs) / 1024
+                blocked = statistics.median(run[2] for run in runs)
+                if profile == 'none':
+                    baseline = (load_time, transferred)
+                saved = f"{baseline[0] - load_time:>10.2f}s" if baseline else f"{'-':>11}"
+                avoided = f"{baseline[1] - transferred:>11.0f}" if baseline else f"{'-':>11}"
+                print(f"{url[:40]:<40} {profile:<10} {load_time:>7.2f}s {transferred:>8.0f} {blocked:>8.0f} {saved} {avoided}")
+    finally:
+        common.shutdown_driver_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark of the HTML cleaning stage of common.get_source_content.
+
+Compares the single-pass common.clean_content_tree with the previous implementation
+(repeated find_all() passes in simplify_nested_tags / remove_empty_tags), checks that
+both produce identical output, and compares html.parser with lxml.
+
+Usage:
+    python benchmarks/bench_cleaning.py [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup, Comment
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common as common
+
+
+##############################################
+# PREVIOUS IMPLEMENTATION (REFERENCE)
+##############################################
+
+def legacy_simplify_nested_tags(element):
+    changed = True
+    while changed:
+        changed = False
+        for tag in element.find_all(True):
+            if tag.name in ['div', 'span']:
+                children_tags = [c for c in tag.children if hasattr(c, 'name')]
+                direct_text = ''.join([str(c) for c in tag.children if isinstance(c, str)]).strip()
+                if len(children_tags) == 1 and children_tags[0].name == tag.name and not direct_text:
+                    tag.unwrap()
+                    changed = True
+
+def legacy_remove_empty_tags(element):
+    changed = True
+    while changed:
+        changed = False
+        for tag in element.find_all(True):
+            if not tag.get_text(strip=True):
+                tag.decompose()
+                changed = True
+
+def legacy_clean_content_tree(main_content):
+    for unwanted in main_content.find_all(['script', 'style']):
+        unwanted.decompose()
+    for unwanted in main_content.find_all(['img', 'svg', 'iframe']):
+        unwanted.decompose()
+    for unwanted in main_content.find_all(['nav', 'aside', 'footer', 'header']):
+        if len(unwanted.find_all('a')) == 0:
+            unwanted.decompose()
+    for comment in main_content.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    main_content.attrs = {}
+    for tag in main_content.find_all(True):
+        if tag.name not in common.CLEAN_ALLOWED_TAGS:
+            tag.unwrap()
+        else:
+            allowed_attrs = {}
+            if "href" in tag.attrs:
+                allowed_attrs["href"] = tag["href"]
+            if "id" in tag.attrs:
+                allowed_attrs["id"] = tag["id"]
+            tag.attrs = allowed_attrs
+
+    legacy_simplify_nested_tags(main_content)
+    legacy_remove_empty_tags(main_content)
+
+
+##############################################
+# SYNTHETIC PAGES
+##############################################
+
+def make_large_page(sections=400, seed=1):
+    """A long documentation-like page: many sections with lists, code, tables and noise."""
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Docs</title><style>p{}</style></head><body>',
+             '<nav><a href="/">Home</a><a href="/docs">Docs</a></nav><main id="content" class="main">']
+    for i in range(sections):
+        parts.append(f'<section class="s{i}"><h2 id="h{i}">Section {i}</h2><!-- comment {i} -->')
+        parts.append(f'<div class="wrap"><div><p class="lead">Paragraph {i} <b>bold</b> '
+                     f'<a href="/p/{i}" title="t">link {i}</a></p></div></div>')
+        parts.append('<ul>' + ''.join(f'<li><span><span>item {j}</span></span></li>' for j in range(rng.randint(2, 8))) + '</ul>')
+        parts.append(f'<pre><code>def f{i}():\n    return {i}</code></pre>')
+        parts.append('<table><tr><td>a</td><td>b</td></tr><tr><td> </td><td></td></tr></table>')
+        parts.append('<div><span></span><img src="x.png"><svg><a href="#"><path d=""/></a></svg></div>')
+        parts.append('<aside><p>no links here</p></aside><footer><a href="/f">f</a></footer>')
+        parts.append('<script>var x = 1;</script></section>')
+    parts.append('</main></body></html>')
+    return ''.join(parts)
+
+def make_nested_page(depth=300, breadth=20):
+    """Deeply nested wrappers, the worst case of the previous while-changed loops."""
+    parts = ['<html><body><article>']
+    for b in range(breadth):
+        parts.append('<div><span>' * depth)
+        parts.append(f'text {b}')
+        parts.append('</span></div>' * depth)
+        parts.append('<div>' * depth + '<span> </span>' + '</div>' * depth)
+    parts.append('</article></body></html>')
+    return ''.join(parts)
+
+def make_edge_cases():
+    """Small pages covering the corner cases of the cleaning rules."""
+    return [
+        '<article><div><div><p>x</p></div><span></span></div></article>',
+        '<article><div> <div>keep whitespace sibling</div> </div></article>',
+        '<article><nav><header>no link</header><a href="/">l</a></nav></article>',
+        '<article><header><svg><a href="#">svg link</a></svg>text</header><p>after</p></article>',
+        '<article><footer><a href="/x"></a></footer><p>p</p></article>',
+        '<article><div id="a"><div id="b"><span id="c"><span>deep</span></span></div></div></article>',
+        '<article><table><tr><td><div><div>cell</div></div></td></tr></table></article>',
+        '<article><p>a<!-- c -->b</p><template>t</template><div><template>only template</template></div></article>',
+        '<article><ul><li><a href="/1" id="x" class="c" data-x="1">one</a></li><li>&nbsp;</li></ul></article>',
+        '<article><div><div></div></div><p><em> </em>text</p></article>',
+    ]
+
+
+##############################################
+# BENCHMARK
+##############################################
+
+def clean(html, parser, clean_tree):
+    soup = BeautifulSoup(html, parser)
+    main_content = soup.find('article') or soup.find('main')
+    clean_tree(main_content)
+    result = str(main_content).replace('\n', '')
+    result = re.sub(r'\s+', ' ', result)
+    result = re.sub(r'>\s+<', '><', result)
+    return result.strip()
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    parsers = ['html.parser']
+    if common.HTML_PARSER == 'lxml':
+        parsers.append('lxml')
+
+    # 1. Identical output on every page and parser
+    pages = {'large': make_large_page(), 'nested': make_nested_page()}
+    for parser in parsers:
+        for index, html in enumerate(make_edge_cases() + list(pages.values())):
+            legacy = clean(html, parser, legacy_clean_content_tree)
+            current = clean(html, parser, common.clean_content_tree)
+            if legacy != current:
+                print(f"❌ Output mismatch ({parser}, page {index}):\n  legacy:  {legacy[:300]}\n  current: {current[:300]}")
+                sys.exit(1)
+    print(f"✅ Identical output on {len(make_edge_cases()) + len(pages)} pages ({', '.join(parsers)})")
+
+    # 2. Timings
+    # Parsing is timed separately and subtracted so that only the cleaning stage is compared
+    print(f"\n{'page':<8} {'size':>8} {'parser':<12} {'parse':>8} {'legacy':>10} {'single pass':>12} {'speedup':>8}")
+    for name, html in pages.items():
+        for parser in parsers:
+            parse = best_time(lambda: BeautifulSoup(html, parser), args.repeat)
+            legacy = best_time(lambda: clean(html, parser, legacy_clean_content_tree), args.repeat) - parse
+            current = best_time(lambda: clean(html, parser, common.clean_content_tree), args.repeat) - parse
+            print(f"{name:<8} {len(html) // 1024:>6}KB {parser:<12} {parse:>7.3f}s {legacy:>9.3f}s {current:>11.3f}s "
+                  f"{legacy / max(current, 1e-6):>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
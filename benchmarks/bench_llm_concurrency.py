@@ -0,0 +1,61 @@
+"""
+Benchmark of the throughput of the LLM client (ai.AsyncLLMClient) against the stub server.
+
+Starts benchmarks/stub_llm_server.py in-process with a fixed latency and sends the same
+number of requests from many caller threads (like the threads of an llm worker) for each
+concurrency limit, so that no OpenAI request is sent.
+
+Usage:
+    python benchmarks/bench_llm_concurrency.py [--requests 64] [--callers 32] [--latency 0.5] [--limits 1,4,16,32]
+
+ai.py reads the usual environment variables (OPENAI_API_KEY, ORGANIZATION_ID, PROJECT_ID) on import.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ai as ai
+from stub_llm_server import start_stub_server
+
+
+def run(base_url, limit, requests, callers):
+    ai.llm_client = ai.AsyncLLMClient(base_url=base_url, max_concurrency=limit)
+
+    def one_request(index):
+        start = time.perf_counter()
+        ai.create_response("You are a benchmark.", f"Request {index}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        latencies = sorted(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--requests', type=int, default=64)
+    arg_parser.add_argument('--callers', type=int, default=32, help='caller threads')
+    arg_parser.add_argument('--latency', type=float, default=0.5, help='latency of the stub in seconds')
+    arg_parser.add_argument('--limits', default='1,4,16,32', help='comma separated concurrency limits')
+    args = arg_parser.parse_args()
+
+    server = start_stub_server(latency=args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    print(f"{'limit':>6} {'total':>9} {'req/s':>8} {'p50':>8} {'p99':>8}")
+    for limit in [int(limit) for limit in args.limits.split(',')]:
+        elapsed, latencies = run(base_url, limit, args.requests, args.callers)
+        p99 = latencies[min(len(latencies) - 1, round(0.99 * (len(latencies) - 1)))]
+        print(f"{limit:>6} {elapsed:>8.2f}s {args.requests / elapsed:>8.1f} "
+              f"{statistics.median(latencies):>7.2f}s {p99:>7.2f}s")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Offline micro-benchmarks of the parsing and extraction hot paths.
+
+Runs on the saved pages of benchmarks/corpus plus a generated page nested deeper than the
+recursion limit allows for recursive tree walks (a regression check: every function must
+handle it), with a fake driver serving their page_source so that no browser or network is involved:
+- clean:        parsing + common.clean_page_content (cleaning stage of get_source_content)
+- markdown:     common.html_to_markdown of the cleaned content
+- emails:       common.extract_emails_from_page
+- contact_links: common.find_contact_page_links (parsing included)
+- json:         common.is_valid_json on the output formats of corpus/output_formats.json
+
+Reports latency percentiles per function and page, and the peak memory allocated
+by one call (tracemalloc). Results can be saved and two runs compared.
+
+Usage:
+    python benchmarks/bench_suite.py [--iterations 20] [--only clean,emails] [--save run.json]
+    python benchmarks/bench_suite.py --compare before.json after.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common as common
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+BASE_URL = 'https://www.example.com'
+# Nesting depth of the generated page, well beyond the ~1000 frames of Python's recursion limit
+DEEP_NESTING_LEVELS = 3000
+
+
+class FakeDriver:
+    """Stands in for a Selenium driver that has loaded a saved page."""
+
+    def __init__(self, page_source, current_url=BASE_URL):
+        self.page_source = page_source
+        self.current_url = current_url
+
+
+def deep_nesting_page(levels):
+    """Page whose main content alternates divs, block quotes and emphasis `levels` deep, with text at every level."""
+    opening = ''.join(
+        f"<div>Level {level} <blockquote>" if level % 2 else f"<div>Level {level} <em>"
+        for level in range(levels))
+    closing = ''.join(
+        "</blockquote></div>" if level % 2 else "</em></div>"
+        for level in reversed(range(levels)))
+    return f"<html><body><main>{opening}<a href=\"/contact\">contact@example.com</a>{closing}</main></body></html>"
+
+def load_corpus(corpus_dir):
+    pages = {}
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if file_name.endswith('.html'):
+            with open(os.path.join(corpus_dir, file_name), encoding='utf-8') as file:
+                pages[file_name[:-len('.html')]] = file.read()
+    pages['generated_deep_nesting'] = deep_nesting_page(DEEP_NESTING_LEVELS)
+    with open(os.path.join(corpus_dir, 'output_formats.json'), encoding='utf-8') as file:
+        output_formats = json.load(file)
+    return pages, output_formats
+
+def build_cases(pages, output_formats):
+    """Returns {function name: {input name: callable}}; every callable does one full call."""
+    cleaned = {name: common.clean_page_content(BeautifulSoup(html, common.HTML_PARSER)) for name, html in pages.items()}
+    return {
+        'clean': {
+            name: (lambda html=html: common.clean_page_content(BeautifulSoup(html, common.HTML_PARSER)))
+            for name, html in pages.items()
+        },
+        'markdown': {
+            name: (lambda content=content: common.html_to_markdown(content))
+            for name, content in cleaned.items()
+        },
+        'emails': {
+            name: (lambda html=html: common.extract_emails_from_page(FakeDriver(html)))
+            for name, html in pages.items()
+        },
+        'contact_links': {
+            name: (lambda html=html: common.find_contact_page_links(common.PageDocument(html), BASE_URL))
+            for name, html in pages.items()
+        },
+        'json': {
+            name: (lambda output_format=output_format: common.is_valid_json(output_format, strict=True))
+            for name, output_format in output_formats.items()
+        },
+    }
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(function, iterations, warmup=2):
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p90_ms': percentile(timings, 0.90) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+def run(args):
+    pages, output_formats = load_corpus(args.corpus)
+    cases = build_cases(pages, output_formats)
+    only = set(args.only.split(',')) if args.only else set(cases)
+
+    results = {}
+    print(f"{'function':<14} {'input':<22} {'p50':>9} {'p90':>9} {'p99':>9} {'peak':>10}")
+    for function_name, inputs in cases.items():
+        if function_name not in only:
+            continue
+        for input_name, function in inputs.items():
+            # Quieten the prints of the functions under test
+            stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+            try:
+                stats = measure(function, args.iterations)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            results[f"{function_name}/{input_name}"] = stats
+            print(f"{function_name:<14} {input_name:<22} {stats['p50_ms']:>7.3f}ms {stats['p90_ms']:>7.3f}ms "
+                  f"{stats['p99_ms']:>7.3f}ms {stats['peak_kb']:>8.0f}KB")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({'parser': common.HTML_PARSER, 'iterations': args.iterations, 'results': results}, file, indent=2)
+        print(f"\n💾 Saved to {args.save}")
+
+def compare(before_path, after_path, threshold):
+    with open(before_path, encoding='utf-8') as file:
+        before = json.load(file)['results']
+    with open(after_path, encoding='utf-8') as file:
+        after = json.load(file)['results']
+
+    regressions = 0
+    print(f"{'case':<38} {'p50 before':>11} {'p50 after':>10} {'change':>8} {'peak change':>12}")
+    for case in sorted(before.keys() & after.keys()):
+        old, new = before[case], after[case]
+        change = new['p50_ms'] / max(old['p50_ms'], 1e-6) - 1
+        peak_change = new['peak_kb'] / max(old['peak_kb'], 1e-6) - 1
+        flag = ''
+        if change > threshold:
+            flag = ' ❌'
+            regressions += 1
+        elif change < -threshold:
+            flag = ' ✅'
+        print(f"{case:<38} {old['p50_ms']:>9.2f}ms {new['p50_ms']:>8.2f}ms {change:>+7.0%} {peak_change:>+11.0%}{flag}")
+
+    for case in sorted(before.keys() ^ after.keys()):
+        print(f"{case:<38} only in {'before' if case in before else 'after'}")
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--corpus', default=CORPUS_DIR)
+    arg_parser.add_argument('--iterations', type=int, default=20)
+    arg_parser.add_argument('--only', help='comma separated functions: clean, markdown, emails, contact_links, json')
+    arg_parser.add_argument('--save', help='write the results to this JSON file')
+    arg_parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two saved runs')
+    arg_parser.add_argument('--threshold', type=float, default=0.1, help='relative p50 change reported as a regression')
+    args = arg_parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of the token cost of the content formats sent to the LLM.
+
+Cleans every page of benchmarks/corpus with common.clean_page_content and counts the
+tokens of the cleaned HTML and of its Markdown conversion (common.html_to_markdown),
+using the same counter as the map-reduce budget (ai.estimate_tokens).
+
+Usage:
+    python benchmarks/bench_token_formats.py [--corpus benchmarks/corpus]
+
+ai.py builds its OpenAI client on import, so the usual environment variables
+(OPENAI_API_KEY, ORGANIZATION_ID, PROJECT_ID) must be set; no request is sent.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import common as common
+import ai as ai
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def load_corpus(corpus_dir):
+    pages = {}
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if file_name.endswith('.html'):
+            with open(os.path.join(corpus_dir, file_name), encoding='utf-8') as file:
+                pages[file_name[:-len('.html')]] = file.read()
+    return pages
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--corpus', default=CORPUS_DIR)
+    args = arg_parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"❌ No .html pages found in {args.corpus}")
+        sys.exit(1)
+
+    print(f"{'page':<18} {'raw':>8} {'html tok':>9} {'md tok':>8} {'saved':>7} {'convert':>9}")
+    total_html = total_markdown = 0
+    for name, html in pages.items():
+        cleaned = common.clean_page_content(BeautifulSoup(html, common.HTML_PARSER))
+        start = time.perf_counter()
+        markdown = common.html_to_markdown(cleaned)
+        elapsed = time.perf_counter() - start
+
+        html_tokens = ai.estimate_tokens(cleaned)
+        markdown_tokens = ai.estimate_tokens(markdown)
+        total_html += html_tokens
+        total_markdown += markdown_tokens
+        print(f"{name:<18} {len(html) // 1024:>6}KB {html_tokens:>9} {markdown_tokens:>8} "
+              f"{1 - markdown_tokens / max(html_tokens, 1):>6.0%} {elapsed * 1000:>7.1f}ms")
+
+    print(f"{'total':<18} {'':>8} {total_html:>9} {total_markdown:>8} {1 - total_markdown / max(total_html, 1):>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
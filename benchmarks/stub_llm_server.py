@@ -0,0 +1,121 @@
+"""
+Stub of the OpenAI Responses API, to stand in for OpenAI in local tests and benchmarks.
+
+Answers POST /v1/responses after a fixed latency with a canned answer and a token usage
+estimated from the request size. Requests with a JSON schema text format get an object
+filled from the schema (first enum value or a placeholder of the first non-null type for every property).
+
+Usage:
+    python benchmarks/stub_llm_server.py [--port 8089] [--latency 0.5]
+    LLM_BASE_URL=http://localhost:8089/v1 celery -A celery_app worker -Q llm ...
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fill_schema(schema):
+    """Builds a value matching a (simple) JSON schema."""
+    if 'enum' in schema:
+        return schema['enum'][0]
+    schema_type = schema.get('type')
+    if isinstance(schema_type, list):
+        # Nullable types such as ["string", "null"]
+        schema_type = next((item for item in schema_type if item != 'null'), 'null')
+    if schema_type == 'null':
+        return None
+    if schema_type == 'object':
+        return {name: fill_schema(prop) for name, prop in schema.get('properties', {}).items()}
+    if schema_type == 'array':
+        return [fill_schema(schema.get('items', {}))]
+    if schema_type in ('integer', 'number'):
+        return 0
+    if schema_type == 'boolean':
+        return False
+    return 'stub'
+
+def build_response(request):
+    text_format = (request.get('text') or {}).get('format') or {}
+    if text_format.get('type') == 'json_schema':
+        text = json.dumps(fill_schema(text_format.get('schema', {})))
+    else:
+        text = 'This is a stub answer.'
+
+    input_tokens = len(json.dumps(request)) // 4 + 1
+    output_tokens = len(text) // 4 + 1
+    return {
+        'id': f"resp_{uuid.uuid4().hex}",
+        'object': 'response',
+        'created_at': int(time.time()),
+        'status': 'completed',
+        'model': request.get('model', 'stub'),
+        'output': [{
+            'type': 'message',
+            'id': f"msg_{uuid.uuid4().hex}",
+            'status': 'completed',
+            'role': 'assistant',
+            'content': [{'type': 'output_text', 'text': text, 'annotations': []}],
+        }],
+        'parallel_tool_calls': True,
+        'tool_choice': 'auto',
+        'tools': [],
+        'usage': {
+            'input_tokens': input_tokens,
+            'input_tokens_details': {'cached_tokens': 0},
+            'output_tokens': output_tokens,
+            'output_tokens_details': {'reasoning_tokens': 0},
+            'total_tokens': input_tokens + output_tokens,
+        },
+    }
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of new connections from a concurrent client overflow the default backlog of 5
+    request_queue_size = 256
+
+
+def make_handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path.rstrip('/') != '/v1/responses':
+                self.send_error(404)
+                return
+            time.sleep(latency)
+            payload = json.dumps(build_response(json.loads(body or b'{}'))).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+def start_stub_server(port=0, latency=0.5):
+    """Starts the stub in a background thread. Returns the server; its base URL is http://127.0.0.1:<port>/v1."""
+    server = StubServer(('127.0.0.1', port), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--port', type=int, default=8089)
+    arg_parser.add_argument('--latency', type=float, default=0.5, help='seconds before every answer')
+    args = arg_parser.parse_args()
+
+    server = StubServer(('0.0.0.0', args.port), make_handler(args.latency))
+    print(f"🤖 Stub LLM listening on http://0.0.0.0:{args.port}/v1 ({args.latency}s latency)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
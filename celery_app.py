@@ -1,13 +1,143 @@
 """
 Celery application for asynchronous web scraping tasks.
-Each worker runs in isolation to prevent Chrome process interference.
+Each worker process keeps its own pool of warm Chrome drivers (see common.DriverPool)
+and never shares browsers with other processes.
 """
 
-from celery import Celery
-from celery.signals import worker_process_shutdown
+from celery import Celery, chain
+from celery import states
+from celery.utils import uuid
+from celery.signals import (
+    before_task_publish, worker_init, worker_process_init, worker_process_shutdown, task_prerun, task_postrun)
+from datetime import datetime
+from kombu.serialization import register as register_serializer
+from kombu.utils import json as kombu_json
+import json
+import msgpack
 import os
+import random
+import struct
+import threading
+import time
+import requests
+import zstandard
 import common as common
 import ai as ai
+import metrics as metrics
+
+# Queues of the three classes of tasks, each consumed by workers sized for it:
+# - browser: may render pages in Chrome (prefork, one task per process)
+# - llm: waits on the OpenAI API (threads)
+# - io: plain HTTP fetches and webhook deliveries (threads)
+BROWSER_QUEUE = os.getenv('BROWSER_QUEUE', 'browser')
+LLM_QUEUE = os.getenv('LLM_QUEUE', 'llm')
+IO_QUEUE = os.getenv('IO_QUEUE', 'io')
+
+TASK_QUEUES = {
+    'crawlic_tasks.scrape_page_content': BROWSER_QUEUE,
+    'crawlic_tasks.render_page': BROWSER_QUEUE,
+    'crawlic_tasks.find_contact_email': BROWSER_QUEUE,
+    'crawlic_tasks.answer_query': LLM_QUEUE,
+    'crawlic_tasks.custom_answer': LLM_QUEUE,
+    'crawlic_tasks.describe_content': LLM_QUEUE,
+    'crawlic_tasks.deliver_webhook': IO_QUEUE,
+}
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """
+    Routes every task to the queue of its class. Page fetches that can never
+    need the browser (render='http') go to the IO workers instead of the browser ones.
+    """
+    fetch_options = (kwargs or {}).get('fetch_options') or {}
+    if TASK_QUEUES.get(name) == BROWSER_QUEUE and fetch_options.get('render') == 'http':
+        return {'queue': IO_QUEUE}
+    if name in TASK_QUEUES:
+        return {'queue': TASK_QUEUES[name]}
+    return None
+
+
+# Compact serializer for task payloads and results (opt-in with COMPACT_SERIALIZER=true,
+# to be set on every web and worker service alike). Payloads smaller than the threshold
+# stay plain JSON; larger ones are stored as msgpack compressed with zstd, behind a
+# header that cannot start a JSON document and that records the JSON size for reporting.
+COMPACT_SERIALIZER = 'msgpack-zstd'
+COMPACT_SERIALIZER_ENABLED = os.getenv('COMPACT_SERIALIZER', 'false').lower() == 'true'
+COMPACT_THRESHOLD = int(os.getenv('COMPACT_SERIALIZER_THRESHOLD', '4096'))
+COMPACT_ZSTD_LEVEL = int(os.getenv('COMPACT_ZSTD_LEVEL', '3'))
+COMPACT_MAGIC = b'\x00CZ1'
+
+# zstd (de)compressors are not thread-safe, keep one per thread
+_codec_local = threading.local()
+
+
+def _zstd(kind):
+    codec = getattr(_codec_local, kind, None)
+    if codec is None:
+        if kind == 'compressor':
+            codec = zstandard.ZstdCompressor(level=COMPACT_ZSTD_LEVEL)
+        else:
+            codec = zstandard.ZstdDecompressor()
+        setattr(_codec_local, kind, codec)
+    return codec
+
+
+def compact_dumps(data):
+    """
+    Encodes a task payload or result: JSON below COMPACT_THRESHOLD bytes, msgpack + zstd above.
+    What is packed is the JSON document itself (keys as strings, kombu type markers for dates...),
+    so that a payload decodes to the same value whatever its size.
+    """
+    encoded = kombu_json.dumps(data).encode('utf-8')
+    json_bytes = len(encoded)
+    if json_bytes >= COMPACT_THRESHOLD:
+        packed = msgpack.packb(json.loads(encoded), use_bin_type=True)
+        compressed = COMPACT_MAGIC + struct.pack('>I', json_bytes) + _zstd('compressor').compress(packed)
+        if len(compressed) < json_bytes:
+            encoded = compressed
+    metrics.SERIALIZED_BYTES.labels(form='json').inc(json_bytes)
+    metrics.SERIALIZED_BYTES.labels(form='stored').inc(len(encoded))
+    return encoded
+
+
+def compact_loads(payload):
+    """
+    Decodes what compact_dumps (or the plain JSON serializer) encoded, and records
+    the sizes of the payload for payload_storage.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    if payload.startswith(COMPACT_MAGIC):
+        header_size = len(COMPACT_MAGIC) + 4
+        json_bytes, = struct.unpack('>I', payload[len(COMPACT_MAGIC):header_size])
+        # Same type markers as kombu's JSON decoder
+        data = msgpack.unpackb(_zstd('decompressor').decompress(payload[header_size:]), raw=False,
+                               object_hook=kombu_json.object_hook)
+        _codec_local.last_storage = {'encoding': COMPACT_SERIALIZER, 'stored_bytes': len(payload),
+                                     'json_bytes': json_bytes, 'saved_bytes': json_bytes - len(payload)}
+    else:
+        data = kombu_json.loads(payload)
+        _codec_local.last_storage = {'encoding': 'json', 'stored_bytes': len(payload),
+                                     'json_bytes': len(payload), 'saved_bytes': 0}
+    return data
+
+
+def payload_storage():
+    """
+    RETURNS:
+        dict with the encoding and the stored / JSON / saved sizes in bytes of the last payload
+        decoded by this thread, or None if the compact serializer is disabled.
+    """
+    if not COMPACT_SERIALIZER_ENABLED:
+        return None
+    return getattr(_codec_local, 'last_storage', None)
+
+
+register_serializer(COMPACT_SERIALIZER, compact_dumps, compact_loads,
+                    content_type='application/x-crawlic-msgpack-zstd', content_encoding='binary')
+
+SERIALIZER = COMPACT_SERIALIZER if COMPACT_SERIALIZER_ENABLED else 'json'
+
 
 # Initialize Celery
 celery = Celery(
@@ -19,40 +149,293 @@ celery = Celery(
 
 # Celery Configuration
 celery.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer=SERIALIZER,
+    # Task messages carry their content type: accepting both lets workers consume the tasks
+    # queued before and after the serializer is switched
+    accept_content=['json', COMPACT_SERIALIZER],
+    result_accept_content=['json', COMPACT_SERIALIZER],
+    result_serializer=SERIALIZER,
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
     task_time_limit=300,  # 5 minutes hard limit
     task_soft_time_limit=280,  # 4:40 soft limit
     worker_prefetch_multiplier=1,  # One task at a time per worker
-    worker_max_tasks_per_child=1,  # Restart worker after each task (ensures Chrome cleanup)
+    # Recycle the worker process (and its warm Chrome pool) after N tasks to bound memory growth
+    worker_max_tasks_per_child=int(os.getenv('WORKER_MAX_TASKS_PER_CHILD', '50')),
     task_acks_late=True,  # Only ack after task completes
     task_reject_on_worker_lost=True,  # Requeue if worker dies
     result_expires=3600,  # Results expire after 1 hour
+    task_default_queue=BROWSER_QUEUE,
+    task_routes=(route_task,),
 )
 
 
+# Deferrals allowed while the domain of a task is rate limited (see defer_throttled_task)
+DOMAIN_MAX_DEFERRALS = int(os.getenv('DOMAIN_MAX_DEFERRALS', '20'))
+
+
+@worker_process_init.connect
+def warm_driver_pool(**kwargs):
+    """
+    Optionally launches a Chrome driver as soon as the worker process starts,
+    so that the first task does not pay the browser cold start.
+    """
+    if os.getenv('DRIVER_POOL_PREWARM', 'false').lower() == 'true':
+        try:
+            common.get_driver_pool().warm(*[common.DRIVER_OPTIONS[task] for task in common.DRIVER_PREWARM_FOR])
+        except Exception as e:
+            print(f"⚠️ Could not pre-warm Chrome driver: {e}")
+
+
+@worker_process_shutdown.connect
+def close_driver_pool(**kwargs):
+    """
+    Quits the warm Chrome drivers of the worker process when it exits.
+    """
+    common.shutdown_driver_pool()
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """
+    Serves the Prometheus metrics of the worker on METRICS_PORT, aggregated over all
+    its child processes when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    port = os.getenv('METRICS_PORT')
+    if port:
+        metrics.clear_multiproc_dir()
+        metrics.start_metrics_server(int(port))
+
+
+@worker_init.connect
+def schedule_cache_pruning(**kwargs):
+    """
+    Keeps the disk page cache and blob store within their TTLs: expired entries are
+    removed every CACHE_PRUNE_INTERVAL seconds by the main process of the worker.
+    """
+    common.start_cache_pruner()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """
+    Drops the live values (gauges) of an exiting child process from the aggregated metrics.
+    """
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+@before_task_publish.connect
+def stamp_task_sent_at(headers=None, **kwargs):
+    """
+    Stamps every published task (including retries) with its publish time,
+    read back by record_task_started to measure the time spent in the queue.
+    """
+    if headers is not None:
+        headers['sent_at'] = time.time()
+
+
+# Start times of the running tasks of this process, by task id
+_task_started_at = {}
+
+@task_prerun.connect
+def record_task_started(sender=None, task_id=None, task=None, **kwargs):
+    """
+    Records the queue wait of a task: from its publish time, or from its ETA for
+    delayed tasks (retries, deferrals), to the moment a worker starts it.
+    """
+    _task_started_at[task_id] = time.monotonic()
+    request = task.request if task is not None else None
+    sent_at = getattr(request, 'sent_at', None)
+    if sent_at is None:
+        return
+    ready_at = float(sent_at)
+    eta = getattr(request, 'eta', None)
+    if eta:
+        try:
+            ready_at = max(ready_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    metrics.TASK_QUEUE_WAIT_SECONDS.labels(task=sender.name).observe(max(0.0, time.time() - ready_at))
+
+
+@task_postrun.connect
+def record_task_finished(sender=None, task_id=None, retval=None, state=None, **kwargs):
+    """
+    Records the duration and outcome of a task: success, error (the task caught the
+    error and returned success False), failure (the task raised) or retry.
+    """
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None:
+        metrics.TASK_SECONDS.labels(task=sender.name).observe(time.monotonic() - started_at)
+
+    if state == states.SUCCESS:
+        outcome = 'error' if isinstance(retval, dict) and retval.get('success') is False else 'success'
+    elif state == states.RETRY:
+        outcome = 'retry'
+    else:
+        outcome = 'failure'
+    metrics.TASK_OUTCOMES.labels(task=sender.name, outcome=outcome).inc()
+
+
+def describe_task_state(state, info):
+    """
+    Builds the status payload of a task from its Celery state and info
+    (the PROGRESS meta, the return value or the exception).
+    Shared by /api/task/<id> and the progress events published to Redis.
+    """
+    if state == states.PENDING:
+        return {
+            'state': state,
+            'status': 'Task is waiting in queue...',
+            'progress': 0
+        }
+    elif state == states.STARTED:
+        return {
+            'state': state,
+            'status': 'Task is processing...',
+            'progress': 5
+        }
+    elif state == 'PROGRESS':
+        info = info if isinstance(info, dict) else {}
+        return {
+            'state': state,
+            'status': info.get('status', 'Processing...'),
+            'progress': info.get('progress', 50)
+        }
+    elif state == states.SUCCESS:
+        return {
+            'state': state,
+            'status': 'Task completed successfully',
+            'progress': 100,
+            'result': info
+        }
+    elif state == states.FAILURE:
+        return {
+            'state': state,
+            'success': False,
+            'status': 'Task failed',
+            'error': str(info),
+            'progress': 0
+        }
+    return {
+        'state': state,
+        'status': str(info),
+        'progress': 0
+    }
+
+
+def client_task_id(task):
+    """
+    Id under which the client follows a running task: the id of the last task of
+    its chain (see render_then), or its own id when it does not run in a chain.
+    """
+    remaining = task.request.chain
+    if remaining:
+        return remaining[0].get('options', {}).get('task_id') or task.request.id
+    return task.request.id
+
+
+def report_progress(task, status, progress):
+    """
+    Records a stage of a running task: stored as the PROGRESS state for /api/task/<id>
+    and published to the task channel for the clients streaming its events.
+    The steps of a chain report under the id of the whole chain (see client_task_id).
+    """
+    meta = {'status': status, 'progress': progress}
+    task_id = client_task_id(task)
+    task.update_state(task_id=task_id, state='PROGRESS', meta=meta)
+    common.publish_task_event(task_id, describe_task_state('PROGRESS', meta))
+
+
+@task_prerun.connect
+def publish_task_started(sender=None, task_id=None, **kwargs):
+    """
+    Publishes the STARTED event of every task that stores its result and tracks its start.
+    The first step of a chain publishes it under the id of the whole chain (see client_task_id),
+    the steps after it do not: the client already saw the chain start.
+    """
+    if sender is not None:
+        client_id = client_task_id(sender)
+        if client_id != task_id:
+            task_id = client_id
+        elif sender.ignore_result or not sender.track_started:
+            return
+    common.publish_task_event(task_id, describe_task_state(states.STARTED, None))
+
+
+@task_postrun.connect
+def publish_task_finished(sender=None, task_id=None, retval=None, state=None, **kwargs):
+    """
+    Publishes the final event of every task that stores its result, with the result.
+    Sent after the result has been stored, so a client may also read it from the backend.
+    """
+    if sender is not None and sender.ignore_result:
+        return
+    common.publish_task_event(task_id, describe_task_state(state, retval))
+
+
+def defer_throttled_task(task, error):
+    """
+    Re-queues a task whose target domain is saturated (see common.domain_slot) instead of
+    keeping the worker busy waiting. The time spent deferred is accumulated in the
+    `domain_deferred` keyword argument so that the task can report it.
+    Gives up with the DomainThrottled error after DOMAIN_MAX_DEFERRALS deferrals.
+    
+    Returns:
+        The Retry exception to raise
+    """
+    countdown = max(error.wait, common.DOMAIN_MAX_INLINE_WAIT) * random.uniform(1.0, 1.5)
+    kwargs = dict(task.request.kwargs)
+    kwargs['domain_deferred'] = round(kwargs.get('domain_deferred', 0) + countdown, 2)
+    report_progress(task, f"Waiting for {error.domain} (rate limited)", 5)
+    return task.retry(countdown=countdown, kwargs=kwargs, max_retries=DOMAIN_MAX_DEFERRALS, exc=error)
+
+
+def ai_fetch_options(fetch_options):
+    """
+    Fetch options of the tasks that send page content to the LLM: the content is
+    requested in the compact AI_CONTENT_FORMAT unless the client asked for another format.
+    """
+    return dict({'content_format': common.AI_CONTENT_FORMAT}, **(fetch_options or {}))
+
+
 @celery.task(bind=True, max_retries=3, name='crawlic_tasks.scrape_page_content')
-def scrape_page_content_task(self, link):
+def scrape_page_content_task(self, link, fetch_options=None, domain_deferred=0):
     """
     Scrapes page content using Selenium in an isolated worker.
     
     Args:
         link (str): URL to scrape
+        fetch_options (dict): Optional keyword arguments for common.get_source_content
+        domain_deferred (float): Seconds already spent deferred by domain rate limits
         
     Returns:
-        dict: Contains success status and content or error
+        dict: Contains success status and content or error. Content larger than
+        common.BLOB_THRESHOLD is replaced by a content_blob reference to download it.
     """
     try:
-        self.update_state(state='PROGRESS', meta={'status': 'Extracting content'})
-        content = common.get_source_content(link)
+        report_progress(self, 'Extracting content', 10)
+        content, page_meta = common.get_source_content(link, with_meta=True, **(fetch_options or {}))
+        page_meta['domain_deferred'] = domain_deferred
+
+        # Large pages are kept out of the result backend, the client downloads them separately
+        blob = common.offload_content(content, page_meta.get('content_format', 'html'))
+        if blob is not None:
+            return {
+                'success': True,
+                'content': None,
+                'content_blob': dict(blob, url=f"/api/blobs/{blob['key']}"),
+                'page_meta': page_meta
+            }
         return {
             'success': True,
-            'content': content
+            'content': content,
+            'page_meta': page_meta
         }
+    except common.DomainThrottled as e:
+        raise defer_throttled_task(self, e)
+
     except Exception as e:
         error_msg = f"Scraping failed: {str(e)}"
         print(f"❌ {error_msg}")
@@ -62,27 +445,81 @@ def scrape_page_content_task(self, link):
         }
     
 
-@celery.task(bind=True, max_retries=3, name='crawlic_tasks.get_answer_from_page')
-def get_answer_from_page_task(self, link, user_query):
+class ChainStepTask(celery.Task):
+    """
+    Base of the tasks that run before another step of a chain. When such a step fails,
+    the steps after it never run, so the failure is recorded under the id the client follows.
+    """
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        client_id = client_task_id(self)
+        if client_id != task_id:
+            # The errbacks (webhook) are already called for this task by the worker
+            self.backend.mark_as_failure(client_id, exc, einfo.traceback, call_errbacks=False)
+            common.publish_task_event(client_id, describe_task_state(states.FAILURE, exc))
+
+
+@celery.task(bind=True, base=ChainStepTask, ignore_result=True, max_retries=3, name='crawlic_tasks.render_page')
+def render_page_task(self, link, fetch_options=None, domain_deferred=0):
     """
-    Scrapes page content using Selenium in an isolated worker then analyzes its
-    content with OpenAI Responses API then answers the user query
+    First step of the page analysis chains (see render_then): fetches the page content
+    in a browser worker and hands it to the LLM step, so that no browser is held while
+    waiting on the LLM.
     
     Args:
         link (str): URL to scrape
+        fetch_options (dict): Optional keyword arguments for common.get_source_content
+        domain_deferred (float): Seconds already spent deferred by domain rate limits
+        
+    Returns:
+        dict: Contains success status and content with its page_meta, or error
+    """
+    try:
+        report_progress(self, 'Extracting content', 10)
+        content, page_meta = common.get_source_content(link, with_meta=True, **(fetch_options or {}))
+        page_meta['domain_deferred'] = domain_deferred
+        return {
+            'success': True,
+            'content': content,
+            'page_meta': page_meta
+        }
+    except common.DomainThrottled as e:
+        raise defer_throttled_task(self, e)
+
+    except Exception as e:
+        error_msg = f"Scraping failed: {str(e)}"
+        print(f"❌ {error_msg}")
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+
+@celery.task(bind=True, track_started=False, name='crawlic_tasks.answer_query')
+def answer_query_task(self, page, user_query):
+    """
+    LLM step of get_answer_from_page: answers the user query with OpenAI Responses API
+    from the content fetched by render_page_task.
+    
+    Args:
+        page (dict): Result of render_page_task
         user_query (str): The question of the user 
         
     Returns:
         dict: Contains success status and AI answer or error
     """
+    if not page['success']:
+        return page
     try:
-        self.update_state(state='PROGRESS', meta={'status': 'Answering user query about content'})
-        content = common.get_source_content(link)
-        answer = ai.get_answer_from_page(content, user_query)
+        report_progress(self, 'Answering user query about content', 50)
+        answer, llm_meta = ai.get_answer_from_page(page['content'], user_query, with_meta=True)
         return {
             'success': True,
-            'answer': answer
+            'answer': answer,
+            'page_meta': page['page_meta'],
+            'llm_meta': llm_meta
         }
+
     except Exception as e:
         error_msg = f"Scraping failed: {str(e)}"
         print(f"❌ {error_msg}")
@@ -92,46 +529,44 @@ def get_answer_from_page_task(self, link, user_query):
         }
     
 
-@celery.task(bind=True, max_retries=3, name='crawlic_tasks.custom_page_content')
-def custom_page_content_task(self, link, output_format, user_query):
+@celery.task(bind=True, track_started=False, name='crawlic_tasks.custom_answer')
+def custom_answer_task(self, page, output_format, user_query):
     """
-    Scrapes page content using Selenium in an isolated worker and then
-    analyzes its content with OpenAI Responses API and answers the user query
-    in a structured JSON format
+    LLM step of custom_page_content: answers the user query with OpenAI Responses API
+    in a structured JSON format from the content fetched by render_page_task.
     
     Args:
-        link (str): URL to scrape
-        user_query (str): The question of the user 
+        page (dict): Result of render_page_task
         output_format (str): The required JSON structure from AI response
+        user_query (str): The question of the user 
         
     Returns:
         dict: Contains success status and custom AI answer in specified
         JSON format or error
     """
+    if not page['success']:
+        return page
     try:
-        self.update_state(state='PROGRESS', meta={'status': 'Answering user query about content'})
-        content = common.get_source_content(link)
-
-        # Check if output_format is valid JSON
-        is_valid, error_msg = common.is_valid_json(
-            output_format,
-            strict=True
-        )
-
-        if not is_valid:
+        # Check that output_format is valid JSON that compiles to a structured output schema
+        try:
+            ai.compile_output_format(output_format)
+        except ValueError as e:
             return {
                 "success": False,
-                "error": f"Invalid JSON format for 'output_format' - {error_msg}"
+                "error": f"Invalid JSON format for 'output_format' - {e}"
             }
 
-        custom_answer = ai.return_custom_page_content(
-            content, user_query, output_format)
+        report_progress(self, 'Answering user query about content', 50)
+        custom_answer, llm_meta = ai.return_custom_page_content(
+            page['content'], user_query, output_format, with_meta=True)
 
         return {
             "success": True,
-            "custom_answer": custom_answer
+            "custom_answer": custom_answer,
+            "page_meta": page['page_meta'],
+            "llm_meta": llm_meta
         }
-    
+
     except Exception as e:
         error_msg = f"API request failed: {str(e)}"
         print(f"❌ {error_msg}")
@@ -141,30 +576,33 @@ def custom_page_content_task(self, link, output_format, user_query):
         }
 
 
-@celery.task(bind=True, max_retries=3, name='crawlic_tasks.describe_page')
-def describe_page_task(self, link):
+@celery.task(bind=True, track_started=False, name='crawlic_tasks.describe_content')
+def describe_content_task(self, page):
     """
-    Scrapes page content using Selenium in an isolated worker and then
-    analyzes its content with OpenAI Responses API
+    LLM step of describe_page: analyzes the content fetched by render_page_task
+    with OpenAI Responses API
     
     Args:
-        link (str): URL to scrape
+        page (dict): Result of render_page_task
         
     Returns:
         dict: Contains success status, content type, and content summary or error
     """
+    if not page['success']:
+        return page
     try:
-        self.update_state(state='PROGRESS', meta={'status': 'Analyzing content'})
-        content = common.get_source_content(link)
+        report_progress(self, 'Analyzing content', 50)
 
         # Analyze content using AI module
-        description = ai.describe_web_page_content(content)
+        description, llm_meta = ai.describe_web_page_content(page['content'], with_meta=True)
         
         # Return structured response
         return{
             "success": True,
             "summary": description.summary,
-            "type": description.type
+            "type": description.type,
+            "page_meta": page['page_meta'],
+            "llm_meta": llm_meta
         }
 
     except Exception as e:
@@ -176,30 +614,128 @@ def describe_page_task(self, link):
         }
 
 
+def render_then(step, link, fetch_options=None):
+    """
+    Chains the render of a page (browser queue, or io queue for render='http') with an
+    LLM step (llm queue) that receives the render result as its first argument.
+    The id of the chain, returned to the client, is the id of the LLM step.
+    
+    Returns:
+        Celery chain, to apply or to put in a group
+    """
+    return chain(render_page_task.s(link, fetch_options=ai_fetch_options(fetch_options)), step)
+
+
+def get_answer_from_page(link, user_query, fetch_options=None):
+    """Scrapes a page then answers the user query about its content."""
+    return render_then(answer_query_task.s(user_query), link, fetch_options)
+
+
+def custom_page_content(link, output_format, user_query, fetch_options=None):
+    """Scrapes a page then answers the user query about its content in the given JSON format."""
+    return render_then(custom_answer_task.s(output_format, user_query), link, fetch_options)
+
+
+def describe_page(link, fetch_options=None):
+    """Scrapes a page then summarizes and classifies its content."""
+    return render_then(describe_content_task.s(), link, fetch_options)
+
+
 @celery.task(bind=True, max_retries=3, name='crawlic_tasks.find_contact_email')
-def find_contact_email_task(self, link):
+def find_contact_email_task(self, link, domain_deferred=0):
     """
     Finds contact emails from a webpage.
     
     Args:
         link (str): URL to search for emails
+        domain_deferred (float): Seconds already spent deferred by domain rate limits
         
     Returns:
         dict: Contains success status and found emails or error
     """
     try:
-        self.update_state(state='PROGRESS', meta={'status': 'Starting email search'})
-        emails = common.find_contact_email(link)
+        report_progress(self, 'Starting email search', 10)
+        # Every request of the search takes its own token of the domain
+        emails, search_meta = common.find_contact_email(link, with_meta=True)
+        domain_wait = search_meta['domain_wait']
         
         return {
             'success': True,
-            'emails': emails
+            'emails': emails,
+            'domain_wait': domain_wait,
+            'domain_deferred': domain_deferred
         }
         
+    except common.DomainThrottled as e:
+        raise defer_throttled_task(self, e)
+
     except Exception as e:
         error_msg = f"Email search failed: {str(e)}"
         print(f"❌ {error_msg}")
         return {
             'success': False,
             'error': error_msg
-        }
\ No newline at end of file
+        }
+
+
+@celery.task(bind=True, ignore_result=True, max_retries=common.WEBHOOK_MAX_RETRIES, name='crawlic_tasks.deliver_webhook')
+def deliver_webhook_task(self, result, callback_url, callback_secret, task_id, state=states.SUCCESS):
+    """
+    POSTs the outcome of a finished task to the callback URL of the client.
+    Linked to the scraping tasks by webhook_options, so it receives their return value first.
+    Network errors, 408, 429 and 5xx responses are retried with exponential backoff;
+    other responses end the delivery.
+    
+    Args:
+        result: Return value of the task (or its error message when state is FAILURE)
+        callback_url (str): URL to POST to
+        callback_secret (str): Optional HMAC signing secret
+        task_id (str): Id of the finished task
+        state (str): Final state of the task
+    """
+    payload = dict({'task_id': task_id}, **describe_task_state(state, result))
+
+    try:
+        response = common.post_webhook(callback_url, payload, callback_secret)
+        if response.status_code < 400:
+            return
+        if response.status_code not in (408, 429) and response.status_code < 500:
+            print(f"⚠️ Webhook of task {task_id} rejected by {callback_url}: HTTP {response.status_code}")
+            return
+        error = f"HTTP {response.status_code}"
+    except ValueError as e:
+        # The host now resolves to an internal address: never retried
+        print(f"❌ Webhook of task {task_id} to {callback_url} refused: {e}")
+        return
+    except requests.exceptions.RequestException as e:
+        error = str(e)
+
+    if self.request.retries >= self.max_retries:
+        print(f"❌ Webhook of task {task_id} to {callback_url} abandoned after {self.request.retries + 1} attempts: {error}")
+        return
+    raise self.retry(countdown=common.webhook_retry_delay(self.request.retries))
+
+
+@celery.task(name='crawlic_tasks.deliver_webhook_failure')
+def deliver_webhook_failure(request, exc, traceback, callback_url, callback_secret, task_id):
+    """
+    Error callback of the tasks queued with a webhook: runs in the failed task's worker
+    and only queues the delivery of the failure.
+    """
+    deliver_webhook_task.delay(str(exc), callback_url, callback_secret, task_id, state=states.FAILURE)
+
+
+def webhook_options(callback_url, callback_secret=None):
+    """
+    Builds the apply_async options that deliver the outcome of a task to a callback URL.
+    The task id is chosen upfront so that the webhook payload can carry it.
+    
+    Returns:
+        dict with task_id, link and link_error
+    """
+    task_id = uuid()
+    return {
+        'task_id': task_id,
+        'link': deliver_webhook_task.s(callback_url, callback_secret, task_id),
+        'link_error': deliver_webhook_failure.s(callback_url, callback_secret, task_id),
+    }
@@ -1,23 +1,36 @@
 # GENERAL IMPORTATIONS
 import requests
 from requests.auth import HTTPProxyAuth
+from requests.adapters import HTTPAdapter
 import random
 import string
 import time
 import re
+import json
+import hashlib
+import hmac
+import ipaddress
+import socket
 import subprocess
 import os
 import signal
+import threading
 import psutil
-from decouple import Config, RepositoryEnv, config
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decouple import Config, RepositoryEnv, Csv, config
 import os
 from pathlib import Path
 from typing import Any, Dict, Optional, List, Union
 
 # SCRAPING IMPORTATIONS
 from seleniumbase import Driver
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup, Comment, CData, NavigableString, Tag
+from html import unescape
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode, unquote
+
+import metrics
 
 # Fetching ENV Variables from .env file
 BASE_DIR = Path(__file__).resolve().parent
@@ -46,10 +59,235 @@ except Exception as e:
     POSTGRES_PORT = config('POSTGRES_PORT')
 
 # GLOBAL_VARIABLES
-PROXIES = [
-"184.174.43.150:6690:smjpoqfr:bg3x4gn8qbz5",
-"154.6.116.19:5988:smjpoqfr:bg3x4gn8qbz5",
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Proxies as 'ip:port:username:password', comma separated in PROXIES and/or one per line in PROXY_FILE
+PROXIES = config('PROXIES', default='', cast=Csv())
+PROXY_FILE = config('PROXY_FILE', default='')
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.5615.138 Safari/537.36 AVG/112.0.21002.139"
+
+# Proxy pool settings (see ProxyManager below)
+PROXY_CHECK_URL = config('PROXY_CHECK_URL', default='http://httpbin.org/ip')
+PROXY_CHECK_INTERVAL = config('PROXY_CHECK_INTERVAL', default=60, cast=int)
+PROXY_CHECK_TIMEOUT = config('PROXY_CHECK_TIMEOUT', default=5, cast=float)
+PROXY_CHECK_WORKERS = 8
+PROXY_COOLDOWN = config('PROXY_COOLDOWN', default=30, cast=int)
+PROXY_QUARANTINE_FAILURES = config('PROXY_QUARANTINE_FAILURES', default=4, cast=int)
+PROXY_QUARANTINE_TTL = config('PROXY_QUARANTINE_TTL', default=900, cast=int)
+PROXY_PICK_TOP = 3
+PROXY_REDIS_PREFIX = 'crawlic:proxies:'
+
+# Driver pool settings (see DriverPool below)
+DRIVER_POOL_SIZE = config('DRIVER_POOL_SIZE', default=1, cast=int)
+DRIVER_MAX_USES = config('DRIVER_MAX_USES', default=20, cast=int)
+DRIVER_ACQUIRE_TIMEOUT = config('DRIVER_ACQUIRE_TIMEOUT', default=120, cast=int)
+# Driver options (proxy, headless, incognito, disable_cookies) requested by the browser tasks.
+# The pool only reuses a driver launched with the same options, so pre-warming uses these too.
+DRIVER_OPTIONS = {
+    'page': (False, False, False, False),     # fetch_page_browser
+    'contact': (False, True, True, False),    # find_contact_email
+}
+# Tasks whose drivers are launched when a worker process starts, in order, while the pool has room
+DRIVER_PREWARM_FOR = config('DRIVER_PREWARM_FOR', default='page,contact', cast=Csv())
+
+# Page readiness settings (see wait_for_page_ready below)
+PAGE_READY_TIMEOUT = config('PAGE_READY_TIMEOUT', default=15, cast=float)
+PAGE_NETWORK_IDLE_MS = config('PAGE_NETWORK_IDLE_MS', default=500, cast=int)
+PAGE_DOM_QUIET_MS = config('PAGE_DOM_QUIET_MS', default=500, cast=int)
+
+# Tiered fetching settings (see get_source_content below)
+RENDER_MODES = ('auto', 'http', 'browser')
+DEFAULT_RENDER_MODE = config('DEFAULT_RENDER_MODE', default='auto')
+HTTP_FETCH_TIMEOUT = config('HTTP_FETCH_TIMEOUT', default=10, cast=float)
+HTTP_MIN_TEXT_LENGTH = config('HTTP_MIN_TEXT_LENGTH', default=300, cast=int)
+SPA_ROOT_IDS = ['root', 'app', '__next', '__nuxt', 'svelte', 'ember-app']
+NOSCRIPT_WALL_PHRASES = [
+    'enable javascript', 'javascript is disabled', 'javascript is required',
+    'requires javascript', 'turn on javascript', 'need to enable javascript'
+]
+
+# Request blocking settings for the browser (see apply_block_profile below)
+# Patterns for the CDP Network.setBlockedURLs command, matched against the whole URL ('*' matches any
+# sequence of characters). They are anchored to the file extension of the path or to the host, so that
+# e.g. '.mov' does not match www.movingexperts.com
+BLOCK_PATTERNS = {
+    'images': [
+        f"*://*/*.{extension}{query}" for extension in ['png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp']
+        for query in ['', '?*']
+    ],
+    'media': [
+        f"*://*/*.{extension}{query}" for extension in ['mp4', 'webm', 'mov', 'm3u8', 'mp3', 'm4a', 'ogg', 'wav']
+        for query in ['', '?*']
+    ],
+    'fonts': [
+        f"*://*/*.{extension}{query}" for extension in ['woff', 'woff2', 'ttf', 'otf', 'eot']
+        for query in ['', '?*']
+    ],
+    # Hosts serving the tracking scripts and beacons, not the sites of the vendors (blog.hubspot.com...)
+    'trackers': [
+        f"*://{subdomain}{domain}/*" for domain in [
+            'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+            'googleadservices.com', 'adservice.google.com', 'connect.facebook.net', 'analytics.twitter.com',
+            'static.ads-twitter.com', 'snap.licdn.com', 'static.hotjar.com', 'script.hotjar.com', 'clarity.ms',
+            'cdn.segment.com', 'api.segment.io', 'cdn.mxpnl.com', 'api-js.mixpanel.com', 'cdn.amplitude.com',
+            'api2.amplitude.com', 'edge.fullstory.com', 'rs.fullstory.com', 'js-agent.newrelic.com', 'nr-data.net',
+            'quantserve.com', 'scorecardresearch.com', 'criteo.com', 'taboola.com', 'outbrain.com', 'adnxs.com',
+            'amazon-adsystem.com', 'js.hs-scripts.com', 'js.hs-analytics.net', 'track.hubspot.com',
+            'widget.intercom.io', 'cdn.optimizely.com', 'logx.optimizely.com', 'script.crazyegg.com',
+        ] + config('BLOCKED_DOMAINS', default='', cast=Csv())
+        for subdomain in ['', '*.']
+    ],
+}
+# Profile name -> blocked pattern groups; selectable per request with the 'block_profile' fetch option
+BLOCK_PROFILES = {
+    'none': (),
+    'trackers': ('trackers',),
+    'text': ('images', 'media', 'fonts', 'trackers'),
+}
+DEFAULT_BLOCK_PROFILE = config('DEFAULT_BLOCK_PROFILE', default='text')
+CONTACT_BLOCK_PROFILE = 'text'
+# Record network statistics (requests, blocked requests, bytes) of every page rendered in the browser
+BROWSER_NETWORK_STATS = config('BROWSER_NETWORK_STATS', default=True, cast=bool)
+
+# HTML cleaning settings (see clean_content_tree below)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+CLEAN_REMOVED_TAGS = {'script', 'style', 'img', 'svg', 'iframe'}
+CLEAN_STRUCTURAL_TAGS = {'nav', 'aside', 'footer', 'header'}
+CLEAN_ALLOWED_TAGS = {
+    'p', 'ul', 'ol', 'li', 'div', 'span', 'a', 'button',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'em', 'blockquote', 'pre', 'code'
+}
+CLEAN_ALLOWED_ATTRS = ('href', 'id')
+CLEAN_COLLAPSIBLE_TAGS = {'div', 'span'}
+CONTENT_FORMATS = ('html', 'markdown')
+# Format of the content sent to the LLM by the AI tasks
+AI_CONTENT_FORMAT = config('AI_CONTENT_FORMAT', default='markdown')
+MARKDOWN_BLOCK_TAGS = {
+    'p', 'div', 'ul', 'ol', 'li', 'pre', 'blockquote',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6'
+}
+# String types counted as text by Tag.get_text() (comments, scripts, templates... are not)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+# Contact email search settings (see find_contact_email below)
+CONTACT_KEYWORDS = [
+    'contact', 'contact-us', 'contact_us', 'contactus',
+    'about', 'about-us', 'about_us', 'aboutus',
+    'team', 'staff', 'management',
+    'support', 'help', 'feedback'
 ]
+COMMON_CONTACT_PATHS = [
+    '/contact', '/contact-us', '/contact_us', '/contactus',
+    '/about', '/about-us', '/about_us', '/aboutus',
+    '/team', '/staff', '/support', '/help'
+]
+CONTACT_MAX_CANDIDATES = config('CONTACT_MAX_CANDIDATES', default=20, cast=int)
+# Probes run concurrently, but never more at once than DOMAIN_MAX_CONCURRENCY (see probe_contact_pages)
+CONTACT_PROBE_WORKERS = config('CONTACT_PROBE_WORKERS', default=8, cast=int)
+# Longest wait for the domain before each request of the search after the main page; a request that
+# cannot get a slot in time is skipped (the main page raises DomainThrottled so that the task is deferred)
+CONTACT_DOMAIN_MAX_WAIT = config('CONTACT_DOMAIN_MAX_WAIT', default=30, cast=float)
+CONTACT_PROBE_TIMEOUT = config('CONTACT_PROBE_TIMEOUT', default=5, cast=float)
+SITEMAP_MAX_FILES = 4
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+EMAIL_SKIPPED_TAGS = {'script', 'style', 'noscript'}
+EMAIL_IGNORED_DOMAINS = {
+    'example.com', 'test.com', 'domain.com', 'yoursite.com',
+    'yourdomain.com', 'website.com', 'company.com', 'business.com',
+    'sentry.io', 'google-analytics.com', 'googletagmanager.com'
+}
+EMAIL_IGNORED_SUFFIXES = ('.png', '.jpg', '.js')
+SITEMAP_LOC_PATTERN = re.compile(r'<loc>\s*(.*?)\s*</loc>', re.IGNORECASE | re.DOTALL)
+
+# Page content cache settings (see get_source_content below)
+PAGE_CACHE_BACKEND = config('PAGE_CACHE_BACKEND', default='redis')
+PAGE_CACHE_TTL = config('PAGE_CACHE_TTL', default=3600, cast=int)
+PAGE_CACHE_DIR = config('PAGE_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'pages'))
+# Query parameters dropped from the cache key: only the ones that never change the page served
+# (generic names such as 'ref' or 'source' select content on some sites and are kept)
+TRACKING_QUERY_PREFIXES = ('utm_', 'mc_')
+TRACKING_QUERY_PARAMS = {'fbclid', 'gclid', 'msclkid', '_ga'}
+
+# Blob store of large results (see get_blob_store below): 'disk', 's3' (or S3-compatible such as MinIO) or 'none'
+# The web service and the workers producing results must share the store (same volume or bucket)
+BLOB_STORE = config('BLOB_STORE', default='none')
+BLOB_THRESHOLD = config('BLOB_THRESHOLD', default=65536, cast=int)  # bytes of content kept inline in results
+BLOB_TTL = config('BLOB_TTL', default=86400, cast=int)
+BLOB_DIR = config('BLOB_DIR', default=os.path.join(BASE_DIR, 'cache', 'blobs'))
+BLOB_S3_BUCKET = config('BLOB_S3_BUCKET', default='crawlic-blobs')
+BLOB_S3_ENDPOINT_URL = config('BLOB_S3_ENDPOINT_URL', default=None)
+BLOB_S3_ACCESS_KEY = config('BLOB_S3_ACCESS_KEY', default=None)
+BLOB_S3_SECRET_KEY = config('BLOB_S3_SECRET_KEY', default=None)
+BLOB_S3_REGION = config('BLOB_S3_REGION', default=None)
+BLOB_CHUNK_SIZE = 64 * 1024
+BLOB_CONTENT_TYPES = {'html': 'text/html; charset=utf-8', 'md': 'text/markdown; charset=utf-8'}
+# Seconds between two prunes of the expired entries of the disk page cache and blob store, 0 disables
+# (see start_cache_pruner below, started by every Celery worker)
+CACHE_PRUNE_INTERVAL = config('CACHE_PRUNE_INTERVAL', default=3600, cast=int)
+
+# LLM response cache settings (see ai.LLMResponseCache)
+LLM_CACHE_ENABLED = config('LLM_CACHE_ENABLED', default=True, cast=bool)
+LLM_CACHE_SIZE = config('LLM_CACHE_SIZE', default=512, cast=int)
+LLM_CACHE_TTL = config('LLM_CACHE_TTL', default=900, cast=int)
+
+# Large page handling for LLM calls (see ai.split_content_into_chunks)
+LLM_SINGLE_CALL_MAX_TOKENS = config('LLM_SINGLE_CALL_MAX_TOKENS', default=40000, cast=int)
+LLM_CHUNK_TOKENS = config('LLM_CHUNK_TOKENS', default=12000, cast=int)
+LLM_MAP_CONCURRENCY = config('LLM_MAP_CONCURRENCY', default=4, cast=int)
+
+# LLM client settings (see ai.AsyncLLMClient)
+# LLM_BASE_URL points the client to any server implementing the Responses API (e.g. benchmarks/stub_llm_server.py)
+LLM_BASE_URL = config('LLM_BASE_URL', default=None)
+LLM_MAX_CONCURRENCY = config('LLM_MAX_CONCURRENCY', default=16, cast=int)
+LLM_REQUEST_TIMEOUT = config('LLM_REQUEST_TIMEOUT', default=60, cast=float)
+LLM_MAX_RETRIES = config('LLM_MAX_RETRIES', default=2, cast=int)
+
+# Per-domain politeness settings (see domain_slot below)
+DOMAIN_DEFAULT_DELAY = config('DOMAIN_DEFAULT_DELAY', default=1.0, cast=float)
+# Per-domain overrides of the delay between requests, e.g. "example.com=2.5,docs.example.org=0"
+DOMAIN_DELAYS = {
+    domain.strip().lower(): float(delay)
+    for domain, delay in (item.split('=', 1) for item in config('DOMAIN_DELAYS', default='', cast=Csv()) if '=' in item)
+}
+DOMAIN_BURST = config('DOMAIN_BURST', default=2, cast=int)
+DOMAIN_MAX_CONCURRENCY = config('DOMAIN_MAX_CONCURRENCY', default=2, cast=int)
+DOMAIN_SLOT_LEASE = config('DOMAIN_SLOT_LEASE', default=300, cast=int)
+DOMAIN_MAX_INLINE_WAIT = config('DOMAIN_MAX_INLINE_WAIT', default=5, cast=float)
+DOMAIN_SLOT_POLL = 1.0
+DOMAIN_REDIS_PREFIX = 'crawlic:domains:'
+
+# Single-flight fetch settings (see single_flight below)
+SINGLE_FLIGHT_ENABLED = config('SINGLE_FLIGHT_ENABLED', default=True, cast=bool)
+SINGLE_FLIGHT_LEASE = config('SINGLE_FLIGHT_LEASE', default=60, cast=int)
+SINGLE_FLIGHT_WAIT = config('SINGLE_FLIGHT_WAIT', default=240, cast=int)
+SINGLE_FLIGHT_RESULT_TTL = 30
+SINGLE_FLIGHT_PREFIX = 'crawlic:inflight:'
+
+# Task progress events settings (see publish_task_event below)
+TASK_EVENTS_CHANNEL_PREFIX = 'crawlic:task-events:'
+# Every open stream holds a request thread of the web worker: streams end after TASK_EVENTS_TIMEOUT
+# (clients reconnect) and at most TASK_EVENTS_MAX_STREAMS are open per web worker process, which
+# leaves the other threads to the rest of the API
+TASK_EVENTS_TIMEOUT = config('TASK_EVENTS_TIMEOUT', default=60, cast=int)
+TASK_EVENTS_KEEPALIVE = config('TASK_EVENTS_KEEPALIVE', default=15, cast=int)
+TASK_EVENTS_MAX_STREAMS = config('TASK_EVENTS_MAX_STREAMS', default=4, cast=int)
+TASK_EVENTS_RETRY_AFTER = config('TASK_EVENTS_RETRY_AFTER', default=5, cast=int)
+
+# Completion webhook settings (see post_webhook below)
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10, cast=float)
+WEBHOOK_MAX_RETRIES = config('WEBHOOK_MAX_RETRIES', default=8, cast=int)
+WEBHOOK_RETRY_BACKOFF = config('WEBHOOK_RETRY_BACKOFF', default=5, cast=int)
+WEBHOOK_RETRY_BACKOFF_MAX = config('WEBHOOK_RETRY_BACKOFF_MAX', default=600, cast=int)
+WEBHOOK_USER_AGENT = 'Crawlic-Webhooks/1.0'
+# Callback URLs resolving to loopback, private, link-local or reserved addresses (redis, cloud metadata...)
+# are rejected; only enable for local development with a receiver on the internal network
+WEBHOOK_ALLOW_PRIVATE_ADDRESSES = config('WEBHOOK_ALLOW_PRIVATE_ADDRESSES', default=False, cast=bool)
 
 ##############################################
 ##############################################
@@ -63,6 +301,7 @@ PROXIES = [
 # FUNCTIONS TO USE AFTER SCRAPING
 ##############################################
 
+@metrics.timed_stage('driver_quit')
 def quit_driver(driver):
     # Quit the driver and release resources
     driver.quit()
@@ -112,24 +351,19 @@ def parse_proxy(proxy_string):
 
 def find_working_proxy():
     """
-    Randomly shuffles the list of proxies and tests each one until a working proxy is found.
-    Returns the first working proxy as a dictionary, or None if none work.
+    Returns the best healthy proxy of the proxy pool as a dictionary, or None if none is available.
+    Proxies are health-checked in the background by the ProxyManager, so this does not wait on the network.
     """
-    random.shuffle(PROXIES)
-    for proxy in PROXIES:
-        parsed_proxy = parse_proxy(proxy)
-        if test_proxy(parsed_proxy):
-            return parsed_proxy
-    print("No working proxy found.")
-    return None
+    proxy = get_proxy_manager().pick()
+    if proxy is None:
+        print("No working proxy found.")
+    return proxy
 
-def test_proxy(proxy):
+def test_proxy(proxy, timeout: float = PROXY_CHECK_TIMEOUT):
     """
     Tests if a given proxy (dictionary with ip, port, username, password) is working by making a request
-    to http://httpbin.org/ip. Returns True if the proxy works, False otherwise.
+    to PROXY_CHECK_URL (http://httpbin.org/ip by default). Returns True if the proxy works, False otherwise.
     """
-    print(f"Testing Proxy : {proxy['ip']}:{proxy['port']}")
-    url = "http://httpbin.org/ip"  # Simple URL to test the proxy
     proxies = {
         "http": f"http://{proxy['ip']}:{proxy['port']}",
         "https": f"http://{proxy['ip']}:{proxy['port']}",
@@ -137,33 +371,224 @@ def test_proxy(proxy):
     auth = HTTPProxyAuth(proxy['username'], proxy['password'])
 
     try:
-        response = requests.get(url, proxies=proxies, auth=auth, timeout=5)
-        if response.status_code == 200:
-            print(f"Proxy {proxy} works! IP: {response.json()['origin']}")
-            return True
+        response = requests.get(PROXY_CHECK_URL, proxies=proxies, auth=auth, timeout=timeout)
+        return response.status_code == 200
     except requests.exceptions.RequestException as e:
-        print(f"Proxy {proxy} failed: {e}")
+        print(f"Proxy {proxy['ip']}:{proxy['port']} failed: {e}")
     return False
 
 
+##############################################
+# PROXY POOL (HEALTH SCORES IN REDIS)
+##############################################
+
+class ProxyManager:
+    """
+    Pool of the configured proxies with health scores shared by every process through Redis.
+
+    Each proxy (identified by 'ip:port') lives in exactly one of three sorted sets:
+    - available: proxies that can be picked, scored by success rate and latency (higher is better)
+    - cooldown: proxies that just failed, until the time they become available again
+    - quarantine: proxies that failed PROXY_QUARANTINE_FAILURES times in a row; they only come
+      back once a background health check succeeds after the quarantine has expired
+    Success/failure counts and the latency moving average are kept in a hash per proxy.
+    """
+
+    def __init__(self, proxies: List[str], redis_client=None, prefix: str = PROXY_REDIS_PREFIX):
+        self.proxies = {}
+        for proxy_string in proxies:
+            parsed = parse_proxy(proxy_string)
+            if parsed is None:
+                print("⚠️ Ignoring malformed proxy entry (expected ip:port:username:password)")
+                continue
+            self.proxies[f"{parsed['ip']}:{parsed['port']}"] = parsed
+        self.redis = redis_client or get_redis_client()
+        self.available_key = f"{prefix}available"
+        self.cooldown_key = f"{prefix}cooldown"
+        self.quarantine_key = f"{prefix}quarantine"
+        self.stats_prefix = f"{prefix}stats:"
+        self.check_lock_key = f"{prefix}check-lock"
+        self._checker_pid = None
+
+    def sync(self):
+        """Adds newly configured proxies to the available set and drops proxies no longer configured."""
+        pipe = self.redis.pipeline()
+        for key in (self.available_key, self.cooldown_key, self.quarantine_key):
+            pipe.zrange(key, 0, -1)
+        known = set()
+        for members in pipe.execute():
+            known.update(member.decode() for member in members)
+
+        pipe = self.redis.pipeline()
+        for proxy_id in self.proxies.keys() - known:
+            pipe.zadd(self.available_key, {proxy_id: self._score({})})
+        for proxy_id in known - self.proxies.keys():
+            for key in (self.available_key, self.cooldown_key, self.quarantine_key):
+                pipe.zrem(key, proxy_id)
+            pipe.delete(self.stats_prefix + proxy_id)
+        pipe.execute()
+
+    @staticmethod
+    def _score(stats: dict) -> float:
+        """Success rate (smoothed so that new proxies start at 0.5) divided by 1 + latency in seconds."""
+        successes = float(stats.get(b'successes', 0))
+        failures = float(stats.get(b'failures', 0))
+        latency = float(stats.get(b'latency', 1.0))
+        return (successes + 1) / (successes + failures + 2) / (1 + latency)
+
+    def _release_cooled(self):
+        """Moves the proxies whose cooldown has expired back to the available set."""
+        for member in self.redis.zrangebyscore(self.cooldown_key, '-inf', time.time()):
+            # ZREM succeeds in a single process, which then owns the move
+            if self.redis.zrem(self.cooldown_key, member):
+                proxy_id = member.decode()
+                stats = self.redis.hgetall(self.stats_prefix + proxy_id)
+                self.redis.zadd(self.available_key, {proxy_id: self._score(stats)})
+
+    def pick(self) -> Optional[dict]:
+        """
+        Returns one of the best PROXY_PICK_TOP available proxies (randomly, to spread the load)
+        as a dictionary with ip, port, username, password and id, or None if none is available.
+        """
+        if not self.proxies:
+            return None
+        self.start_health_checks()
+        self._release_cooled()
+        best = [member.decode() for member in self.redis.zrevrange(self.available_key, 0, PROXY_PICK_TOP - 1)]
+        random.shuffle(best)
+        for proxy_id in best:
+            if proxy_id in self.proxies:
+                return dict(self.proxies[proxy_id], id=proxy_id)
+        return None
+
+    def is_available(self, proxy_id: str) -> bool:
+        """Returns True if the proxy is in rotation (neither cooling down nor quarantined)."""
+        return self.redis.zscore(self.available_key, proxy_id) is not None
+
+    def record_success(self, proxy_id: str, latency: Optional[float] = None):
+        """Counts a successful use or health check of a proxy and makes it available again."""
+        stats_key = self.stats_prefix + proxy_id
+        stats = self.redis.hgetall(stats_key)
+        updates = {'consecutive_failures': 0, 'last_success': time.time()}
+        if latency is not None:
+            previous = float(stats.get(b'latency', latency))
+            updates['latency'] = 0.7 * previous + 0.3 * latency
+            stats[b'latency'] = updates['latency']
+        stats[b'successes'] = float(stats.get(b'successes', 0)) + 1
+
+        pipe = self.redis.pipeline()
+        pipe.hincrby(stats_key, 'successes', 1)
+        pipe.hset(stats_key, mapping=updates)
+        pipe.zrem(self.cooldown_key, proxy_id)
+        pipe.zrem(self.quarantine_key, proxy_id)
+        pipe.zadd(self.available_key, {proxy_id: self._score(stats)})
+        pipe.execute()
+
+    def record_failure(self, proxy_id: str, reason: str = ''):
+        """
+        Counts a failure of a proxy and takes it out of rotation: into cooldown (doubling with
+        every consecutive failure), or into quarantine after PROXY_QUARANTINE_FAILURES in a row.
+        """
+        stats_key = self.stats_prefix + proxy_id
+        pipe = self.redis.pipeline()
+        pipe.hincrby(stats_key, 'failures', 1)
+        pipe.hincrby(stats_key, 'consecutive_failures', 1)
+        pipe.hset(stats_key, 'last_failure', time.time())
+        pipe.zrem(self.available_key, proxy_id)
+        consecutive = pipe.execute()[1]
+
+        if consecutive >= PROXY_QUARANTINE_FAILURES:
+            self.redis.zrem(self.cooldown_key, proxy_id)
+            self.redis.zadd(self.quarantine_key, {proxy_id: time.time() + PROXY_QUARANTINE_TTL})
+            print(f"🚫 Proxy {proxy_id} quarantined after {consecutive} consecutive failures {reason}".rstrip())
+        else:
+            self.redis.zadd(self.cooldown_key, {proxy_id: time.time() + PROXY_COOLDOWN * 2 ** (consecutive - 1)})
+
+    def check_all(self):
+        """
+        Health-checks every proxy that is not under an active quarantine, in parallel,
+        and records the outcome and latency of each check.
+        """
+        quarantined = {
+            member.decode() for member in self.redis.zrangebyscore(self.quarantine_key, time.time(), '+inf')
+        }
+        proxy_ids = [proxy_id for proxy_id in self.proxies if proxy_id not in quarantined]
+        if not proxy_ids:
+            return
+
+        def check(proxy_id):
+            start = time.monotonic()
+            ok = test_proxy(self.proxies[proxy_id])
+            return proxy_id, ok, time.monotonic() - start
+
+        with ThreadPoolExecutor(max_workers=min(PROXY_CHECK_WORKERS, len(proxy_ids))) as executor:
+            for proxy_id, ok, latency in executor.map(check, proxy_ids):
+                if ok:
+                    self.record_success(proxy_id, latency)
+                else:
+                    self.record_failure(proxy_id, '(health check)')
+
+    def start_health_checks(self):
+        """
+        Starts the background thread of the current process that health-checks the proxies every
+        PROXY_CHECK_INTERVAL seconds. A Redis lock ensures a single process checks per interval.
+        """
+        if self._checker_pid == os.getpid():
+            return
+        self._checker_pid = os.getpid()
+
+        def run():
+            while True:
+                try:
+                    if self.redis.set(self.check_lock_key, os.getpid(), nx=True, ex=PROXY_CHECK_INTERVAL):
+                        self.check_all()
+                except Exception as e:
+                    print(f"⚠️ Proxy health check failed: {e}")
+                time.sleep(PROXY_CHECK_INTERVAL)
+
+        threading.Thread(target=run, name='proxy-health-checks', daemon=True).start()
+
+
+_proxy_manager = None
+
+def load_proxy_list() -> List[str]:
+    """Returns the configured proxies: PROXIES followed by the non-comment lines of PROXY_FILE."""
+    proxies = [proxy.strip() for proxy in PROXIES if proxy.strip()]
+    if PROXY_FILE:
+        with open(PROXY_FILE, encoding='utf-8') as file:
+            proxies += [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    return proxies
+
+def get_proxy_manager() -> ProxyManager:
+    """Returns the proxy manager of the current process, creating and syncing it on first use."""
+    global _proxy_manager
+    if _proxy_manager is None:
+        _proxy_manager = ProxyManager(load_proxy_list())
+        if _proxy_manager.proxies:
+            _proxy_manager.sync()
+            _proxy_manager.start_health_checks()
+    return _proxy_manager
+
+
 ##############################################
 # FUNCTIONS TO USE WHILE SCRAPING
 ##############################################
 
+@metrics.timed_stage('driver_launch')
 def initiate_driver(proxy: bool, headless: bool, incognito: bool, disable_cookies: bool):
     """
     Initializes and returns a SeleniumBase Chrome driver. Optionally uses a working proxy and headless mode.
-    Kills any existing Chrome or chromedriver processes before starting.
+    Scraping code should not call this directly but go through the DriverPool, which reuses
+    warm browsers and takes care of cleaning up leftover Chrome processes.
     """
-    
-    kill_chrome_in_current_worker()
-    
-    # time.sleep(5)
-    pass
 
     print("launching the driver")
+    proxy_id = None
     if proxy:
         working_proxy = find_working_proxy()
+        if working_proxy is None:
+            raise RuntimeError("No healthy proxy available")
+        proxy_id = working_proxy['id']
         proxy_ip = working_proxy['ip']
         proxy_port = working_proxy['port']
         proxy_username = working_proxy['username']
@@ -172,19 +597,24 @@ def initiate_driver(proxy: bool, headless: bool, incognito: bool, disable_cookie
         proxy = f"{proxy_username}:{proxy_password}@{proxy_ip}:{proxy_port}"
 
         # Initialize SeleniumBase driver
-        driver = Driver(
-            browser="chrome",
-            uc=True,
-            headless2=headless,
-            incognito=incognito,
-            agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.5615.138 Safari/537.36 AVG/112.0.21002.139",
-            do_not_track=True,
-            undetectable=True,
-            disable_cookies=disable_cookies,
-            no_sandbox=True,  # Equivalent to adding "--no-sandbox"
-            disable_gpu=True,  # Equivalent to adding "--disable-gpu"
-            proxy=proxy  # Add the proxy here
-        )
+        try:
+            driver = Driver(
+                browser="chrome",
+                uc=True,
+                headless2=headless,
+                incognito=incognito,
+                agent=USER_AGENT,
+                do_not_track=True,
+                undetectable=True,
+                disable_cookies=disable_cookies,
+                no_sandbox=True,  # Equivalent to adding "--no-sandbox"
+                disable_gpu=True,  # Equivalent to adding "--disable-gpu"
+                log_cdp_events=BROWSER_NETWORK_STATS,  # Network events for collect_network_stats
+                proxy=proxy  # Add the proxy here
+            )
+        except Exception as e:
+            get_proxy_manager().record_failure(proxy_id, f"(driver launch: {e})")
+            raise
     else:
         # Initialize SeleniumBase driver
         driver = Driver(
@@ -193,58 +623,435 @@ def initiate_driver(proxy: bool, headless: bool, incognito: bool, disable_cookie
             headless2=headless,
             incognito=incognito,
             disable_cookies=disable_cookies,
-            agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.5615.138 Safari/537.36 AVG/112.0.21002.139",
+            agent=USER_AGENT,
             do_not_track=True,
             undetectable=True,
             no_sandbox=True,  # Equivalent to adding "--no-sandbox"
             disable_gpu=True,  # Equivalent to adding "--disable-gpu"
+            log_cdp_events=BROWSER_NETWORK_STATS,  # Network events for collect_network_stats
         )
         
     driver.set_window_size(1920, 1080)
+    # Lets the driver pool report the outcome of the tasks back to the proxy scores
+    driver.proxy_id = proxy_id
     return driver
 
-def find_contact_email(url):
+
+##############################################
+# DRIVER POOL (WARM BROWSERS REUSED ACROSS TASKS)
+##############################################
+
+class DriverPool:
+    """
+    Keeps up to `size` warm Chrome drivers alive in the current worker process so that
+    tasks do not pay the cold start of a new browser every time.
+
+    Drivers are keyed by their launch options (proxy, headless, incognito, disable_cookies).
+    Between tasks every driver is reset (extra tabs closed, cookies/storage/cache cleared)
+    and health-checked. A driver is recycled after `max_uses` tasks or as soon as it
+    fails a reset or health check.
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE, max_uses: int = DRIVER_MAX_USES):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._lock = threading.Condition()
+        self._idle = []       # list of driver records waiting to be reused
+        self._records = {}    # id(driver) -> driver record, for every live driver
+
+    def _launch(self, options: tuple) -> dict:
+        """Launches a new driver for the given options and registers it in the pool."""
+        if not self._records:
+            # Nothing alive in this pool: anything chrome-like left over is an orphan
+            kill_chrome_in_current_worker()
+        driver = initiate_driver(*options)
+        record = {'driver': driver, 'options': options, 'uses': 0, 'created_at': time.time(),
+                  'proxy_id': getattr(driver, 'proxy_id', None)}
+        self._records[id(driver)] = record
+        return record
+
+    def _retire(self, record: dict):
+        """Quits a driver and removes it from the pool. Must be called with the lock held."""
+        self._records.pop(id(record['driver']), None)
+        metrics.DRIVER_POOL_EVENTS.labels(event='retire').inc()
+        try:
+            with metrics.time_stage('driver_quit'):
+                record['driver'].quit()
+        except Exception as e:
+            print(f"⚠️ Error quitting pooled driver: {e}")
+        if not self._records:
+            # Last-resort cleanup once no pooled browser is supposed to be alive
+            kill_chrome_in_current_worker()
+
+    def _is_healthy(self, driver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Brings a used driver back to a blank state so the next task does not inherit anything."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            # Storage is not accessible on some pages (about:blank, sandboxed frames)
+            pass
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+        driver.get('about:blank')
+        # Drop the network events of this task so that they are not counted for the next one
+        collect_network_stats(driver)
+
+    def acquire(self, proxy: bool, headless: bool, incognito: bool, disable_cookies: bool,
+                timeout: float = DRIVER_ACQUIRE_TIMEOUT):
+        """
+        Returns a ready-to-use driver for the given options, reusing an idle one when possible.
+        Raises TimeoutError if no driver could be obtained within `timeout` seconds.
+        """
+        options = (proxy, headless, incognito, disable_cookies)
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            while True:
+                # 1. Reuse an idle driver launched with the same options
+                for record in self._idle:
+                    if record['options'] == options:
+                        self._idle.remove(record)
+                        if record['proxy_id'] and not get_proxy_manager().is_available(record['proxy_id']):
+                            print("♻️ Proxy of pooled driver is out of rotation, recycling it")
+                            self._retire(record)
+                            break
+                        if self._is_healthy(record['driver']):
+                            record['uses'] += 1
+                            metrics.DRIVER_POOL_EVENTS.labels(event='reuse').inc()
+                            return record['driver']
+                        print("♻️ Pooled driver failed health check, recycling it")
+                        metrics.DRIVER_POOL_EVENTS.labels(event='health_check_failed').inc()
+                        self._retire(record)
+                        break
+                else:
+                    # 2. Room left in the pool: launch a new one
+                    if len(self._records) < self.size:
+                        break
+                    # 3. Pool is full: make room by retiring an idle driver with other options
+                    if self._idle:
+                        self._retire(self._idle.pop(0))
+                        break
+                    # 4. Everything is busy: wait for a release
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("No Chrome driver available in the pool")
+                    self._lock.wait(remaining)
+
+            record = self._launch(options)
+            record['uses'] += 1
+            metrics.DRIVER_POOL_EVENTS.labels(event='launch').inc()
+            return record['driver']
+
+    def release(self, driver, broken: bool = False):
+        """
+        Gives a driver back to the pool. The driver is reset and kept warm unless it is
+        marked as broken, fails to reset, or has reached its maximum number of uses.
+        """
+        with self._lock:
+            record = self._records.get(id(driver))
+            if record is None:
+                return
+
+            if record['proxy_id']:
+                try:
+                    if broken:
+                        get_proxy_manager().record_failure(record['proxy_id'], '(browser error)')
+                    else:
+                        get_proxy_manager().record_success(record['proxy_id'])
+                except Exception as e:
+                    print(f"⚠️ Could not update proxy score: {e}")
+
+            if not broken and record['uses'] < self.max_uses:
+                try:
+                    self._reset(driver)
+                    broken = not self._is_healthy(driver)
+                except Exception as e:
+                    print(f"⚠️ Error resetting pooled driver: {e}")
+                    broken = True
+            else:
+                broken = True
+
+            if broken:
+                self._retire(record)
+            else:
+                self._idle.append(record)
+            self._lock.notify()
+
+    @contextmanager
+    def driver(self, proxy: bool = False, headless: bool = False, incognito: bool = False,
+               disable_cookies: bool = False):
+        """
+        Context manager around acquire/release. The driver is recycled if the body raises
+        a WebDriver error, since the browser may have crashed.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        driver = self.acquire(proxy, headless, incognito, disable_cookies)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def warm(self, *option_sets: tuple):
+        """
+        Launches idle drivers ahead of time so the first tasks do not wait on Chrome:
+        one per option set (see DRIVER_OPTIONS), in order, while the pool has room.
+        """
+        with self._lock:
+            for options in option_sets:
+                if len(self._records) >= self.size:
+                    break
+                if not any(record['options'] == options for record in self._records.values()):
+                    self._idle.append(self._launch(tuple(options)))
+
+    def shutdown(self):
+        """Quits every pooled driver and kills any Chrome process left behind by this worker."""
+        with self._lock:
+            for record in list(self._records.values()):
+                self._retire(record)
+            self._idle = []
+        kill_chrome_in_current_worker()
+
+
+_driver_pool = None
+_driver_pool_pid = None
+
+def get_driver_pool() -> DriverPool:
+    """
+    Returns the driver pool of the current process, creating it on first use.
+    The pool is never shared across a fork: a child process gets its own pool.
+    """
+    global _driver_pool, _driver_pool_pid
+    if _driver_pool is None or _driver_pool_pid != os.getpid():
+        _driver_pool = DriverPool()
+        _driver_pool_pid = os.getpid()
+    return _driver_pool
+
+def shutdown_driver_pool():
+    """Quits every warm browser of the current process, if a pool was ever created."""
+    if _driver_pool is not None and _driver_pool_pid == os.getpid():
+        _driver_pool.shutdown()
+    else:
+        kill_chrome_in_current_worker()
+
+##############################################
+# PAGE READINESS DETECTION
+##############################################
+
+# Installed in the page on first poll: records the time of the last DOM mutation and
+# returns the signals wait_for_page_ready needs in a single round trip.
+PAGE_READINESS_PROBE = """
+    const selector = arguments[0];
+    if (!window.__crawlicReadiness && document.documentElement) {
+        window.__crawlicReadiness = {lastMutation: performance.now()};
+        new MutationObserver(function () {
+            window.__crawlicReadiness.lastMutation = performance.now();
+        }).observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+    }
+    const resources = performance.getEntriesByType('resource');
+    let lastResponseEnd = 0;
+    for (const entry of resources) {
+        lastResponseEnd = Math.max(lastResponseEnd, entry.responseEnd);
+    }
+    return {
+        readyState: document.readyState,
+        now: performance.now(),
+        resourceCount: resources.length,
+        lastResponseEnd: lastResponseEnd,
+        lastMutation: window.__crawlicReadiness ? window.__crawlicReadiness.lastMutation : performance.now(),
+        selectorFound: selector ? document.querySelector(selector) !== null : false
+    };
+"""
+
+def wait_for_page_ready(
+    driver,
+    timeout: float = PAGE_READY_TIMEOUT,
+    selector: Optional[str] = None,
+    network_idle_ms: int = PAGE_NETWORK_IDLE_MS,
+    dom_quiet_ms: int = PAGE_DOM_QUIET_MS,
+    poll_interval: float = 0.1) -> Dict[str, Any]:
+    """
+    Waits until the page loaded in `driver` is usable instead of sleeping a fixed amount of time.
+
+    Without a selector the page is ready once document.readyState is 'complete', no resource
+    finished loading for `network_idle_ms` and the DOM has not mutated for `dom_quiet_ms`.
+    With a selector the page is ready as soon as an element matching it exists.
+    `timeout` is a hard upper bound: the page is used as is once it is reached.
+
+    Args:
+        driver: Selenium WebDriver instance with the page already requested
+        timeout (float): Maximum number of seconds to wait
+        selector (str): Optional CSS selector to wait for
+        network_idle_ms (int): Quiet period required on the network
+        dom_quiet_ms (int): Quiet period required on the DOM
+
+    Returns:
+        dict: {'signal': name of the signal that made the page ready (or 'timeout'),
+               'elapsed': seconds spent waiting}
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    # Time at which each condition was first seen satisfied, the last one to fire is reported
+    fired_at = {}
+
+    while True:
+        try:
+            state = driver.execute_script(PAGE_READINESS_PROBE, selector)
+        except Exception as e:
+            # Navigation in progress or page replaced while polling: try again on the next tick
+            print(f"⚠️ Readiness probe failed: {e}")
+            state = None
+
+        if state:
+            if selector:
+                if state['selectorFound']:
+                    signal_name = 'selector'
+                    break
+            else:
+                conditions = {
+                    'ready_state': state['readyState'] == 'complete',
+                    'network_idle': (state['now'] - state['lastResponseEnd']) >= network_idle_ms,
+                    'dom_quiet': (state['now'] - state['lastMutation']) >= dom_quiet_ms,
+                }
+                for name, satisfied in conditions.items():
+                    if not satisfied:
+                        fired_at.pop(name, None)
+                    elif name not in fired_at:
+                        fired_at[name] = time.monotonic()
+
+                if all(conditions.values()):
+                    signal_name = max(fired_at, key=fired_at.get)
+                    break
+
+        if time.monotonic() >= deadline:
+            signal_name = 'timeout'
+            break
+        time.sleep(poll_interval)
+
+    readiness = {
+        'signal': signal_name,
+        'elapsed': round(time.monotonic() - start, 3)
+    }
+    print(f"⏱️ Page ready after {readiness['elapsed']}s (signal: {readiness['signal']})")
+    return readiness
+
+@contextmanager
+def contact_domain_slot(url: str, waits: list, max_wait: float = CONTACT_DOMAIN_MAX_WAIT):
+    """
+    domain_slot around one request of the contact search, recording the time waited in `waits`.
+    Every request of the search (pages, HEAD probes, robots.txt, sitemaps) takes its own token,
+    so that the search respects the per-domain limits like any other fetch.
+    """
+    with domain_slot(url, max_wait=max_wait) as waited:
+        waits.append(waited)
+        yield waited
+
+def find_contact_email(url, with_meta: bool = False):
     """
     Finds and returns email addresses from a website's contact page.
+
+    The main page is rendered in the browser. If it has no email, candidate contact pages
+    (links found on the page, sitemap.xml entries and common paths) are probed concurrently
+    over plain HTTP; only the candidates that need JavaScript are then rendered in the browser.
+    Each request takes a token of its domain (see contact_domain_slot).
     
     Args:
         url (str): The website URL to search for contact information
+        with_meta (bool): If True, also return a dict with the seconds spent waiting for the domain
         
     Returns:
         list: List of email addresses found, or empty list if none found
+        (a (emails, meta) tuple if with_meta is True)
+
+    Raises:
+        DomainThrottled: If the domain stays saturated before the main page could be loaded
     """
-    driver = initiate_driver(False, True, True, False)
+    waits = []
+    emails = search_contact_emails(url, waits)
+    if with_meta:
+        return emails, {'domain_wait': round(sum(waits), 2)}
+    return emails
+
+def search_contact_emails(url, waits: list):
+    """Contact email search of find_contact_email, recording the time waited for the domain in `waits`."""
+    pool = get_driver_pool()
+    driver = pool.acquire(*DRIVER_OPTIONS['contact'])
     
     try:
+        # Only the text of the pages matters here
+        apply_block_profile(driver, CONTACT_BLOCK_PROFILE, url)
+
         # Start with the main page
-        driver.get(url)
-        time.sleep(3)
+        with contact_domain_slot(url, waits, max_wait=DOMAIN_MAX_INLINE_WAIT):
+            with metrics.time_stage('navigation'):
+                driver.get(url)
+        with metrics.time_stage('page_ready'):
+            wait_for_page_ready(driver, timeout=10)
+        log_network_stats(url, CONTACT_BLOCK_PROFILE, collect_network_stats(driver))
         
         # Get the base domain for building absolute URLs
         base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
         
+        # Parse the main page once for both link discovery and email extraction
+        document = PageDocument.from_driver(driver)
+
         # Look for contact page links
-        contact_urls = find_contact_page_links(driver, base_url)
+        contact_urls = find_contact_page_links(document, base_url)
         
         # Search for emails on main page first
-        emails = extract_emails_from_page(driver)
+        emails = extract_emails_from_document(document)
         
         if emails:
             print(f"Found emails on main page: {emails}")
             return emails
+
+        # Seed more candidates from the sitemap
+        for sitemap_url in find_sitemap_contact_links(base_url, waits):
+            if sitemap_url not in contact_urls:
+                contact_urls.append(sitemap_url)
+        contact_urls = contact_urls[:CONTACT_MAX_CANDIDATES]
         
-        # If no emails found on main page, try contact pages
-        for contact_url in contact_urls:
+        # If no emails found on main page, probe the contact pages concurrently over HTTP
+        emails, browser_urls = probe_contact_pages(contact_urls, waits)
+        if emails:
+            return emails
+
+        # Render the candidates that need JavaScript in the browser
+        for contact_url in browser_urls:
             try:
                 print(f"Checking contact page: {contact_url}")
-                driver.get(contact_url)
-                time.sleep(5)
+                with contact_domain_slot(contact_url, waits):
+                    driver.get(contact_url)
+                wait_for_page_ready(driver, timeout=8)
                 
                 emails = extract_emails_from_page(driver)
                 if emails:
                     print(f"Found emails on {contact_url}: {emails}")
                     return emails
                     
+            except DomainThrottled as e:
+                print(f"Skipping the remaining contact pages: {e}")
+                break
             except Exception as e:
                 print(f"Error accessing {contact_url}: {e}")
                 continue
@@ -252,41 +1059,211 @@ def find_contact_email(url):
         print("No emails found on any contact pages")
         return []
         
+    except DomainThrottled:
+        raise
     except Exception as e:
         print(f"Error during email extraction: {e}")
         return []
     
     finally:
-        quit_driver(driver)
+        # Reset and health-check happen on release, a crashed browser gets recycled there
+        pool.release(driver)
+
+def probe_contact_pages(contact_urls, waits: Optional[list] = None):
+    """
+    Checks candidate contact pages concurrently over plain HTTP.
+
+    Guessed paths (COMMON_CONTACT_PATHS) are first checked with a HEAD request so that
+    missing pages are dropped cheaply. The remaining pages are fetched in parallel, at most
+    DOMAIN_MAX_CONCURRENCY at once and each request with a token of its domain; the first
+    page that yields emails wins and the pending checks are cancelled. Pages whose domain
+    stays saturated for CONTACT_DOMAIN_MAX_WAIT seconds are skipped.
+
+    Args:
+        contact_urls (list): Candidate contact page URLs, in order of preference
+        waits (list): Optional list the seconds waited for the domain are appended to
+
+    Returns:
+        Tuple of (emails, browser_urls)
+        - emails: Emails of the first page that had some, or an empty list
+        - browser_urls: Candidates that could not be checked without a browser, in their original order
+    """
+    if not contact_urls:
+        return [], []
+
+    found = threading.Event()
+    waits = waits if waits is not None else []
+
+    def check(contact_url):
+        if found.is_set():
+            return contact_url, 'cancelled', []
+
+        try:
+            if urlparse(contact_url).path in COMMON_CONTACT_PATHS:
+                with contact_domain_slot(contact_url, waits):
+                    status = probe_url_status(contact_url)
+                if status in (404, 410):
+                    return contact_url, 'missing', []
+
+            if found.is_set():
+                return contact_url, 'cancelled', []
+
+            with contact_domain_slot(contact_url, waits):
+                html, error = fetch_page_http(contact_url)
+        except DomainThrottled:
+            return contact_url, 'throttled', []
+
+        if html is None:
+            if error in ('http_status_404', 'http_status_410', 'not_html'):
+                return contact_url, 'missing', []
+            return contact_url, 'needs_browser', []
+
+        document = PageDocument(html)
+        needs_browser = detect_js_requirement(document.soup) is not None
+        emails = extract_emails_from_document(document)
+        if emails:
+            return contact_url, 'found', emails
+        return contact_url, 'needs_browser' if needs_browser else 'empty', []
+
+    workers = min(CONTACT_PROBE_WORKERS, len(contact_urls))
+    if DOMAIN_MAX_CONCURRENCY > 0:
+        # More threads would only wait for the slots of the domain
+        workers = min(workers, DOMAIN_MAX_CONCURRENCY)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(check, contact_url) for contact_url in contact_urls]
+    browser_urls = set()
+
+    try:
+        for future in as_completed(futures):
+            try:
+                contact_url, outcome, emails = future.result()
+            except Exception as e:
+                print(f"Error probing contact page: {e}")
+                continue
+
+            print(f"Probed contact page {contact_url}: {outcome}")
+            if outcome == 'found':
+                print(f"Found emails on {contact_url}: {emails}")
+                found.set()
+                return emails, []
+            if outcome == 'needs_browser':
+                browser_urls.add(contact_url)
+    finally:
+        # Running checks see the event and stop early, queued ones are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return [], [contact_url for contact_url in contact_urls if contact_url in browser_urls]
+
+def probe_url_status(url) -> Optional[int]:
+    """
+    Returns the HTTP status of `url` using a HEAD request, or None if it could not be determined.
+    """
+    try:
+        response = get_http_session().head(url, timeout=CONTACT_PROBE_TIMEOUT, allow_redirects=True)
+        return response.status_code
+    except requests.exceptions.RequestException:
+        return None
+
+def find_sitemap_contact_links(base_url, waits: Optional[list] = None):
+    """
+    Finds contact-like pages listed in the website sitemap (sitemap.xml and the sitemaps
+    declared in robots.txt). Sitemap indexes are followed one level deep.
+    Each request takes a token of its domain; the search stops when the domain stays saturated.
+
+    Args:
+        base_url (str): Base URL of the website
+        waits (list): Optional list the seconds waited for the domain are appended to
+
+    Returns:
+        list: List of contact page URLs found in the sitemap
+    """
+    session = get_http_session()
+    sitemap_urls = [base_url + '/sitemap.xml']
+    waits = waits if waits is not None else []
+
+    try:
+        with contact_domain_slot(base_url + '/robots.txt', waits):
+            robots = session.get(base_url + '/robots.txt', timeout=CONTACT_PROBE_TIMEOUT)
+        if robots.status_code == 200:
+            for line in robots.text.splitlines():
+                if line.lower().startswith('sitemap:'):
+                    sitemap_url = line.split(':', 1)[1].strip()
+                    if sitemap_url not in sitemap_urls:
+                        sitemap_urls.append(sitemap_url)
+    except DomainThrottled as e:
+        print(f"Skipping the sitemaps: {e}")
+        return []
+    except requests.exceptions.RequestException:
+        pass
+
+    contact_urls = []
+    visited = 0
+    while sitemap_urls and visited < SITEMAP_MAX_FILES:
+        sitemap_url = sitemap_urls.pop(0)
+        visited += 1
+        try:
+            with contact_domain_slot(sitemap_url, waits):
+                response = session.get(sitemap_url, timeout=CONTACT_PROBE_TIMEOUT)
+        except DomainThrottled as e:
+            print(f"Skipping the remaining sitemaps: {e}")
+            break
+        except requests.exceptions.RequestException:
+            continue
+        if response.status_code != 200:
+            continue
+
+        locations = SITEMAP_LOC_PATTERN.findall(response.text)
+        if '<sitemapindex' in response.text:
+            sitemap_urls.extend(unescape(location) for location in locations)
+            continue
 
-def find_contact_page_links(driver, base_url):
+        for location in locations:
+            location = unescape(location)
+            path = urlparse(location).path.lower()
+            if any(keyword in path for keyword in CONTACT_KEYWORDS) and location not in contact_urls:
+                contact_urls.append(location)
+
+    return contact_urls[:CONTACT_MAX_CANDIDATES]
+
+class PageDocument:
+    """
+    A page parsed once and shared by everything that reads it (contact link discovery,
+    email extraction, JavaScript detection), instead of re-parsing the HTML in each function.
+    The HTML is only parsed on first access to `soup`.
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+        self._soup = None
+
+    @classmethod
+    def from_driver(cls, driver) -> 'PageDocument':
+        """Builds a document from the page currently loaded in a Selenium driver."""
+        return cls(driver.page_source)
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, HTML_PARSER)
+        return self._soup
+
+def find_contact_page_links(document: PageDocument, base_url):
     """
-    Finds potential contact page URLs on the current page.
+    Finds potential contact page URLs on a page.
     
     Args:
-        driver: Selenium WebDriver instance
+        document (PageDocument): The parsed page
         base_url (str): Base URL of the website
         
     Returns:
         list: List of contact page URLs
     """
     contact_urls = []
+    seen_urls = set()
     
     try:
-        # Get page source and parse with BeautifulSoup
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Common contact page indicators
-        contact_keywords = [
-            'contact', 'contact-us', 'contact_us', 'contactus',
-            'about', 'about-us', 'about_us', 'aboutus',
-            'team', 'staff', 'management',
-            'support', 'help', 'feedback'
-        ]
-        
         # Find all links
-        links = soup.find_all('a', href=True)
+        links = document.soup.find_all('a', href=True)
         
         for link in links:
             href = link['href'].lower()
@@ -295,7 +1272,7 @@ def find_contact_page_links(driver, base_url):
             # Check if link or text contains contact keywords
             is_contact_link = any(
                 keyword in href or keyword in link_text 
-                for keyword in contact_keywords
+                for keyword in CONTACT_KEYWORDS
             )
             
             if is_contact_link:
@@ -307,19 +1284,15 @@ def find_contact_page_links(driver, base_url):
                 else:
                     full_url = urljoin(base_url + '/', href)
                 
-                if full_url not in contact_urls:
+                if full_url not in seen_urls:
+                    seen_urls.add(full_url)
                     contact_urls.append(full_url)
         
         # Common contact page paths to try even if no links found
-        common_paths = [
-            '/contact', '/contact-us', '/contact_us', '/contactus',
-            '/about', '/about-us', '/about_us', '/aboutus',
-            '/team', '/staff', '/support', '/help'
-        ]
-        
-        for path in common_paths:
+        for path in COMMON_CONTACT_PATHS:
             full_url = base_url + path
-            if full_url not in contact_urls:
+            if full_url not in seen_urls:
+                seen_urls.add(full_url)
                 contact_urls.append(full_url)
     
     except Exception as e:
@@ -329,7 +1302,7 @@ def find_contact_page_links(driver, base_url):
 
 def extract_emails_from_page(driver):
     """
-    Extracts email addresses from the current page.
+    Extracts email addresses from the page currently loaded in a Selenium driver.
     
     Args:
         driver: Selenium WebDriver instance
@@ -338,65 +1311,74 @@ def extract_emails_from_page(driver):
         list: List of unique email addresses found
     """
     try:
-        # Get page source and parse with BeautifulSoup
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "noscript"]):
-            script.decompose()
-        
-        # Get all text content
-        text_content = soup.get_text()
-        
-        # Also check for emails in href attributes and other attributes
-        all_content = text_content + " "
-        
-        # Check mailto links
-        mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.I))
-        for link in mailto_links:
-            href = link.get('href', '')
-            if href.startswith('mailto:'):
-                email = href.replace('mailto:', '').split('?')[0]  # Remove query parameters
-                all_content += f" {email} "
-        
-        # Check data attributes and other attributes that might contain emails
-        for element in soup.find_all():
-            for attr_name, attr_value in element.attrs.items():
-                if isinstance(attr_value, str) and '@' in attr_value:
-                    all_content += f" {attr_value} "
-        
-        # Email regex pattern
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        # Find all email addresses
-        emails = re.findall(email_pattern, all_content)
-        
-        # Filter out common false positives and clean emails
-        filtered_emails = []
-        ignore_domains = [
-            'example.com', 'test.com', 'domain.com', 'yoursite.com',
-            'yourdomain.com', 'website.com', 'company.com', 'business.com',
-            'sentry.io', 'google-analytics.com', 'googletagmanager.com'
-        ]
+        document = PageDocument.from_driver(driver)
+    except Exception as e:
+        print(f"Error extracting emails: {e}")
+        return []
+
+    return extract_emails_from_document(document)
+
+def extract_emails_from_document(document: PageDocument):
+    """
+    Extracts email addresses from a parsed page in a single scan of the tree.
+    Looks at the visible text, mailto links and every string attribute containing '@',
+    skipping script, style and noscript elements. The document is not modified.
+    
+    Args:
+        document (PageDocument): The parsed page
         
-        for email in emails:
+    Returns:
+        list: List of unique email addresses found
+    """
+    try:
+        # Text, mailto and attribute candidates are kept apart so that emails come out
+        # in the same order as before: text first, then mailto links, then attributes
+        text_parts = []
+        mailto_parts = []
+        attribute_parts = []
+
+        stack = [document.soup]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Tag):
+                if node.name in EMAIL_SKIPPED_TAGS:
+                    continue
+
+                for attr_value in node.attrs.values():
+                    if isinstance(attr_value, str) and '@' in attr_value:
+                        attribute_parts.append(attr_value)
+
+                if node.name == 'a':
+                    href = node.attrs.get('href')
+                    if isinstance(href, str) and href.startswith('mailto:'):
+                        # Remove query parameters
+                        mailto_parts.append(href.replace('mailto:', '').split('?')[0])
+
+                # Children are pushed in reverse so that they are visited in document order
+                stack.extend(reversed(node.contents))
+            elif type(node) in TEXT_STRING_TYPES:
+                text_parts.append(node)
+
+        # Text nodes are joined without separator, like get_text()
+        all_content = ''.join(text_parts) + ' ' + ''.join(
+            f" {part} " for part in mailto_parts + attribute_parts
+        )
+
+        # Find all email addresses and filter out common false positives
+        emails = []
+        for email in EMAIL_PATTERN.findall(all_content):
             email = email.lower().strip()
             domain = email.split('@')[1] if '@' in email else ''
             
             # Skip obvious false positives
-            if (domain not in ignore_domains and 
-                not email.endswith('.png') and 
-                not email.endswith('.jpg') and 
-                not email.endswith('.js') and
+            if (domain not in EMAIL_IGNORED_DOMAINS and
+                not email.endswith(EMAIL_IGNORED_SUFFIXES) and
                 len(email) > 5 and
                 '.' in domain):
-                filtered_emails.append(email)
+                emails.append(email)
         
         # Remove duplicates while preserving order
-        unique_emails = list(dict.fromkeys(filtered_emails))
-        
-        return unique_emails
+        return list(dict.fromkeys(emails))
         
     except Exception as e:
         print(f"Error extracting emails: {e}")
@@ -405,45 +1387,476 @@ def extract_emails_from_page(driver):
 def get_primary_contact_email(url):
     """
     Simplified function that returns the first/primary email found.
+    Like find_contact_email, every request respects the per-domain limits.
     
     Args:
         url (str): Website URL to search
         
     Returns:
         str: First email address found, or None if no email found
+
+    Raises:
+        DomainThrottled: If the domain stays saturated before the main page could be loaded
     """
     emails = find_contact_email(url)
     return emails[0] if emails else None
 
-def get_source_content(url):
+##############################################
+# PAGE CONTENT CACHE
+##############################################
+
+_redis_client = None
+
+def get_redis_client():
     """
-    Scrapes and cleans content from a webpage, preserving links and structure.
-    
-    Args:
-        url: The URL to scrape
-        
-    Returns:
-        Cleaned HTML string with minimal formatting
+    Returns a Redis client for the REDIS_URL used by Celery, creating it on first use.
+    The client keeps its own connection pool and is safe to share between threads.
     """
-    # Load the URL with Selenium
-    driver = initiate_driver(False, False, False, False)
-    driver.get(url)
-    time.sleep(10)
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
 
-    # Get the page source and parse with BeautifulSoup
-    page_source = driver.page_source
-    soup = BeautifulSoup(page_source, 'html.parser')
-    
-    # Define possible selectors for main content
-    main_selectors = [
-        {'tag': 'article'},
-        {'tag': 'div', 'class': 'post-content'},
-        {'tag': 'div', 'class': 'blog-post'},
-        {'tag': 'div', 'class': 'article-content'},
-        {'tag': 'main'}
-    ]
-    
-    # Try to find the main content
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that trivially different spellings of the same page share a cache key.
+    Lowercases scheme and host, drops default ports, fragments and tracking parameters
+    and sorts the query string by parameter name. The path is kept as given: servers may
+    answer /page and /page/ differently.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or 'http'
+    netloc = parsed.hostname.lower() if parsed.hostname else ''
+    if parsed.port and not ((scheme == 'http' and parsed.port == 80) or (scheme == 'https' and parsed.port == 443)):
+        netloc = f"{netloc}:{parsed.port}"
+
+    path = parsed.path or '/'
+
+    # Sorted by name only: repeated parameters keep their order (?tag=b&tag=a is a list for many servers)
+    query = sorted(
+        ((key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+         if not key.lower().startswith(TRACKING_QUERY_PREFIXES) and key.lower() not in TRACKING_QUERY_PARAMS),
+        key=lambda item: item[0]
+    )
+
+    return urlunparse((scheme, netloc, path, '', urlencode(query), ''))
+
+def page_cache_key(url: str, **render_options) -> str:
+    """
+    Builds the cache key of a page from its normalized URL and the options that change how it is rendered.
+    """
+    raw_key = normalize_url(url) + '|' + json.dumps(render_options, sort_keys=True)
+    return 'crawlic:page:' + hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+class RedisPageCache:
+    """Stores cleaned page content in Redis, shared by every worker. Entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: int = PAGE_CACHE_TTL):
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = get_redis_client().get(key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, entry: dict):
+        get_redis_client().setex(key, self.ttl, json.dumps(entry))
+
+class DiskPageCache:
+    """Stores cleaned page content as files on the local disk. Entries expire after `ttl` seconds."""
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR, ttl: int = PAGE_CACHE_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key.replace(':', '_') + '.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['stored_at'] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def set(self, key: str, entry: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Write then rename so that concurrent readers never see a partial file
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Removes every expired entry from the cache directory."""
+        now = time.time()
+        for path in self.directory.glob('*.json'):
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+_page_cache = None
+
+def get_page_cache():
+    """
+    Returns the page cache configured by PAGE_CACHE_BACKEND ('redis', 'disk' or 'none'),
+    or None when caching is disabled.
+    """
+    global _page_cache
+    if _page_cache is None and PAGE_CACHE_BACKEND != 'none':
+        if PAGE_CACHE_BACKEND == 'disk':
+            _page_cache = DiskPageCache()
+        else:
+            _page_cache = RedisPageCache()
+    return _page_cache
+
+_http_session = None
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the pooled HTTP session of the current process, creating it on first use.
+    Reusing one session keeps TCP/TLS connections alive across fetches of the same hosts.
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        _http_session = session
+    return _http_session
+
+@metrics.timed_stage('http_fetch')
+def fetch_page_http(url) -> tuple[Optional[str], Optional[str]]:
+    """
+    Fetches a page with a plain HTTP GET, without running any JavaScript.
+
+    Returns:
+        Tuple of (html, error)
+        - html: The page HTML, or None if it could not be fetched as HTML
+        - error: None on success, otherwise a short reason used in the fetch metadata
+    """
+    try:
+        response = get_http_session().get(url, timeout=HTTP_FETCH_TIMEOUT, allow_redirects=True)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ HTTP fetch failed for {url}: {e}")
+        return None, 'http_error'
+
+    if response.status_code >= 400:
+        return None, f'http_status_{response.status_code}'
+
+    content_type = response.headers.get('Content-Type', '')
+    if 'html' not in content_type.lower():
+        return None, 'not_html'
+
+    # requests falls back to ISO-8859-1 when the server does not send a charset
+    if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+        response.encoding = response.apparent_encoding
+
+    return response.text, None
+
+def visible_text_length(element) -> int:
+    """
+    Returns the length of the text a user would see in `element`,
+    ignoring script, style, noscript and template contents.
+    """
+    if element is None:
+        return 0
+    return sum(
+        len(text.strip()) for text in element.find_all(string=True)
+        if text.parent.name not in ('script', 'style', 'noscript', 'template')
+    )
+
+def detect_js_requirement(soup, wait_selector: Optional[str] = None) -> Optional[str]:
+    """
+    Decides heuristically whether a page fetched over plain HTTP needs a browser to be rendered.
+
+    Args:
+        soup: BeautifulSoup of the HTML returned by the HTTP fetch
+        wait_selector: Optional CSS selector the page must contain
+
+    Returns:
+        None if the HTTP result is usable, otherwise the reason to escalate to the browser
+    """
+    body = soup.body
+    if body is None or visible_text_length(body) == 0:
+        return 'empty_body'
+
+    # Client-side rendered apps ship a near empty mount point
+    for root_id in SPA_ROOT_IDS:
+        root = soup.find(id=root_id)
+        if root is not None and visible_text_length(root) < HTTP_MIN_TEXT_LENGTH:
+            return 'spa_root'
+
+    for noscript in soup.find_all('noscript'):
+        noscript_text = noscript.get_text(' ', strip=True).lower()
+        if any(phrase in noscript_text for phrase in NOSCRIPT_WALL_PHRASES):
+            return 'noscript_wall'
+
+    if wait_selector and soup.select_one(wait_selector) is None:
+        return 'selector_missing'
+
+    return None
+
+@lru_cache(maxsize=1024)
+def block_pattern_regex(pattern: str):
+    """Compiles a Network.setBlockedURLs pattern to the regex Chrome matches whole URLs with."""
+    return re.compile('.*'.join(re.escape(part) for part in pattern.split('*')), re.DOTALL)
+
+def apply_block_profile(driver, profile: str = DEFAULT_BLOCK_PROFILE, url: Optional[str] = None):
+    """
+    Makes the browser cancel the requests matching the patterns of a block profile
+    (see BLOCK_PROFILES) before they are sent. Stays in effect until the driver is reset.
+    Patterns matching `url`, the page about to be loaded, are left out so that the
+    document itself is never blocked.
+    """
+    patterns = [pattern for group in BLOCK_PROFILES[profile] for pattern in BLOCK_PATTERNS[group]]
+    if url:
+        patterns = [pattern for pattern in patterns if not block_pattern_regex(pattern).fullmatch(url)]
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+def collect_network_stats(driver) -> Optional[dict]:
+    """
+    Drains the network events logged by the browser since the last call and summarizes them.
+
+    Returns:
+        dict with the number of requests, finished and blocked requests (total and per resource
+        type) and the bytes transferred, or None if network events are not recorded
+    """
+    if not BROWSER_NETWORK_STATS:
+        return None
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return None
+
+    stats = {'requests': 0, 'finished': 0, 'blocked': 0, 'blocked_by_type': {}, 'transferred_bytes': 0}
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        method, params = message.get('method'), message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            stats['requests'] += 1
+        elif method == 'Network.loadingFinished':
+            stats['finished'] += 1
+            stats['transferred_bytes'] += int(params.get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            stats['blocked'] += 1
+            resource_type = params.get('type', 'Other')
+            stats['blocked_by_type'][resource_type] = stats['blocked_by_type'].get(resource_type, 0) + 1
+    return stats
+
+def log_network_stats(url: str, profile: str, stats: Optional[dict]) -> Optional[dict]:
+    """Prints the requests blocked by a profile and the bytes actually transferred for a page."""
+    if stats is not None:
+        blocked = ', '.join(f"{count} {resource_type}" for resource_type, count in sorted(stats['blocked_by_type'].items()))
+        print(f"🚫 {url}: {stats['blocked']} of {stats['requests']} requests blocked by profile '{profile}'"
+              f"{f' ({blocked})' if blocked else ''}, {stats['transferred_bytes'] // 1024} KB transferred")
+        stats = dict(stats, profile=profile)
+    return stats
+
+def fetch_page_browser(url, wait_selector: Optional[str] = None,
+                       block_profile: str = DEFAULT_BLOCK_PROFILE) -> tuple[str, dict]:
+    """
+    Renders a page in a warm Chrome driver from the pool, with the requests of the
+    block profile (images, fonts, trackers...) cancelled before they leave the browser.
+
+    Returns:
+        Tuple of (page_source, meta) where meta contains the readiness and network reports
+    """
+    meta = {}
+    with get_driver_pool().driver(*DRIVER_OPTIONS['page']) as driver:
+        apply_block_profile(driver, block_profile, url)
+        start = time.monotonic()
+        with metrics.time_stage('navigation'):
+            driver.get(url)
+        with metrics.time_stage('page_ready'):
+            meta['readiness'] = wait_for_page_ready(driver, selector=wait_selector)
+        meta['load_time'] = round(time.monotonic() - start, 3)
+        page_source = driver.page_source
+        meta['network'] = log_network_stats(url, block_profile, collect_network_stats(driver))
+
+    if meta['network'] is not None:
+        metrics.TRANSFERRED_BYTES.inc(meta['network']['transferred_bytes'])
+        for resource_type, count in meta['network']['blocked_by_type'].items():
+            metrics.BLOCKED_REQUESTS.labels(resource_type=resource_type).inc(count)
+    return page_source, meta
+
+def get_source_content(url, wait_selector: Optional[str] = None, render: str = DEFAULT_RENDER_MODE,
+                       max_age: Optional[float] = None, no_cache: bool = False, content_format: str = 'html',
+                       block_profile: str = DEFAULT_BLOCK_PROFILE, with_meta: bool = False):
+    """
+    Returns the cleaned content of a webpage, served from the page cache when a fresh
+    enough copy exists so that several tasks about the same page cost a single fetch.
+    Concurrent misses for the same page are coalesced into one fetch (see single_flight),
+    and fetches respect the per-domain politeness limits (see domain_slot).
+
+    Args:
+        url: The URL to scrape
+        wait_selector: Optional CSS selector the page must contain before it is read
+        render: 'auto' (HTTP first, browser if needed), 'http' (never use the browser)
+            or 'browser' (always use the browser)
+        max_age: Maximum age in seconds of a cached copy, None accepts any unexpired copy
+        no_cache: If True, skip the cache lookup (the fresh result is still stored)
+        content_format: 'html' (cleaned HTML) or 'markdown' (compact Markdown, see html_to_markdown)
+        block_profile: Requests blocked when the page is rendered in the browser, see BLOCK_PROFILES
+        with_meta: If True, also return a dict describing how the page was fetched
+
+    Returns:
+        Cleaned content string, or a (content, meta) tuple if with_meta is True
+
+    Raises:
+        DomainThrottled: If the page's domain stays saturated (the task should retry later)
+    """
+    if render not in RENDER_MODES:
+        raise ValueError(f"Invalid render mode '{render}', expected one of: {', '.join(RENDER_MODES)}")
+    if content_format not in CONTENT_FORMATS:
+        raise ValueError(f"Invalid content format '{content_format}', expected one of: {', '.join(CONTENT_FORMATS)}")
+    if block_profile not in BLOCK_PROFILES:
+        raise ValueError(f"Invalid block profile '{block_profile}', expected one of: {', '.join(BLOCK_PROFILES)}")
+
+    cache = get_page_cache()
+    # Pages rendered with another block profile can differ (e.g. content loaded by blocked scripts)
+    key = page_cache_key(url, wait_selector=wait_selector, render=render, block_profile=block_profile)
+    entry = None
+
+    if cache is not None and not no_cache:
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            print(f"⚠️ Page cache read failed: {e}")
+        if entry is not None and max_age is not None and time.time() - entry['stored_at'] > max_age:
+            entry = None
+
+    if entry is not None:
+        result = entry['content']
+        meta = dict(entry['meta'], cache='hit', cache_age=round(time.time() - entry['stored_at'], 1))
+        metrics.PAGE_CACHE_LOOKUPS.labels(result='hit').inc()
+    else:
+        def fetch():
+            with domain_slot(url) as domain_wait:
+                result, meta = fetch_source_content(url, wait_selector, render, block_profile)
+            metrics.STAGE_SECONDS.labels(stage='domain_wait').observe(domain_wait)
+            if cache is not None:
+                try:
+                    cache.set(key, {'content': result, 'meta': meta, 'stored_at': time.time()})
+                except Exception as e:
+                    print(f"⚠️ Page cache write failed: {e}")
+            return result, dict(meta, domain_wait=domain_wait)
+
+        # Concurrent tasks missing the cache for the same page share a single fetch
+        if SINGLE_FLIGHT_ENABLED:
+            (result, meta), single_flight_role = single_flight(key, fetch)
+        else:
+            (result, meta), single_flight_role = fetch(), 'leader'
+        meta = dict(meta, cache='bypass' if no_cache else 'miss', single_flight=single_flight_role)
+        metrics.PAGE_CACHE_LOOKUPS.labels(result=meta['cache']).inc()
+        metrics.SINGLE_FLIGHT.labels(role=single_flight_role).inc()
+
+    # The cache always holds HTML, other formats are derived from it
+    if content_format == 'markdown':
+        result = html_to_markdown(result)
+    meta = dict(meta, content_format=content_format)
+
+    if with_meta:
+        return result, meta
+    return result
+
+def fetch_source_content(url, wait_selector: Optional[str] = None, render: str = DEFAULT_RENDER_MODE,
+                         block_profile: str = DEFAULT_BLOCK_PROFILE) -> tuple[str, dict]:
+    """
+    Scrapes and cleans content from a webpage, preserving links and structure.
+
+    Pages are first fetched over plain HTTP and only rendered in Chrome when the
+    HTTP result looks like it needs JavaScript (see detect_js_requirement).
+    
+    Args:
+        url: The URL to scrape
+        wait_selector: Optional CSS selector the page must contain before it is read
+        render: 'auto' (HTTP first, browser if needed), 'http' (never use the browser)
+            or 'browser' (always use the browser)
+        block_profile: Requests blocked when the page is rendered in the browser, see BLOCK_PROFILES
+        
+    Returns:
+        Tuple of (cleaned HTML string, dict describing how the page was fetched)
+    """
+    meta = {}
+    result = None
+
+    if render in ('auto', 'http'):
+        html, reason = fetch_page_http(url)
+        if html is not None:
+            with metrics.time_stage('parse'):
+                soup = BeautifulSoup(html, HTML_PARSER)
+            if render == 'http':
+                reason = None
+            else:
+                reason = detect_js_requirement(soup, wait_selector)
+            if reason is None:
+                result = clean_page_content(soup)
+                if render == 'auto' and len(re.sub(r'<[^>]+>', '', result)) < HTTP_MIN_TEXT_LENGTH:
+                    reason = 'thin_content'
+                    result = None
+
+        if result is not None:
+            meta['tier'] = 'http'
+            metrics.FETCHES.labels(tier='http', outcome='success').inc()
+        elif render == 'http':
+            metrics.FETCHES.labels(tier='http', outcome='failure').inc()
+            raise ValueError(f"Could not fetch {url} over HTTP ({reason})")
+        else:
+            metrics.FETCHES.labels(tier='http', outcome='escalated').inc()
+            print(f"🔼 Escalating {url} to the browser ({reason})")
+            meta['escalation_reason'] = reason
+
+    if result is None:
+        try:
+            page_source, browser_meta = fetch_page_browser(url, wait_selector, block_profile)
+        except Exception:
+            metrics.FETCHES.labels(tier='browser', outcome='failure').inc()
+            raise
+        metrics.FETCHES.labels(tier='browser', outcome='success').inc()
+        meta.update(browser_meta)
+        meta['tier'] = 'browser'
+        with metrics.time_stage('parse'):
+            soup = BeautifulSoup(page_source, HTML_PARSER)
+        result = clean_page_content(soup)
+
+    return result, meta
+
+@metrics.timed_stage('clean')
+def clean_page_content(soup) -> str:
+    """
+    Extracts the main content of a parsed page and strips it down to minimal HTML,
+    preserving links and structure. The soup is modified in place.
+
+    Args:
+        soup: BeautifulSoup of the full page
+
+    Returns:
+        Cleaned HTML string with minimal formatting, or an empty string if no content was found
+    """
+    # Define possible selectors for main content
+    main_selectors = [
+        {'tag': 'article'},
+        {'tag': 'div', 'class': 'post-content'},
+        {'tag': 'div', 'class': 'blog-post'},
+        {'tag': 'div', 'class': 'article-content'},
+        {'tag': 'main'}
+    ]
+    
+    # Try to find the main content
     main_content = None
     for selector in main_selectors:
         if 'class' in selector:
@@ -462,98 +1875,830 @@ def get_source_content(url):
     
     # Clean up the content
     if main_content:
-        # Remove scripts and styles (always unwanted)
-        for unwanted in main_content.find_all(['script', 'style']):
-            unwanted.decompose()
-
-        # Remove visual elements but keep their parent containers
-        for unwanted in main_content.find_all(['img', 'svg', 'iframe']):
-            unwanted.decompose()
-
-        # Only remove structural elements if they don't contain links
-        for unwanted in main_content.find_all(['nav', 'aside', 'footer', 'header']):
-            if len(unwanted.find_all('a')) == 0:
-                unwanted.decompose()
-
-        # Remove HTML comments
-        from bs4 import Comment
-        for comment in main_content.find_all(string=lambda text: isinstance(text, Comment)):
-            comment.extract()
-        
-        # Define allowed HTML tags
-        allowed_tags = {
-            'p', 'ul', 'ol', 'li', 'div', 'span', 'a', 'button',
-            'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-            'strong', 'em', 'blockquote', 'pre', 'code'
-        }
-        
-        # Remove attributes from the main_content tag itself
-        main_content.attrs = {}
-        
-        # Clean tags: unwrap non-allowed tags and strip attributes from allowed tags
-        for tag in main_content.find_all(True):
-            if tag.name not in allowed_tags:
-                tag.unwrap()
-            else:
-                # Keep only href and id attributes
-                allowed_attrs = {}
-                if "href" in tag.attrs:
-                    allowed_attrs["href"] = tag["href"]
-                if "id" in tag.attrs:
-                    allowed_attrs["id"] = tag["id"]
-                tag.attrs = allowed_attrs
-        
-        # Simplify redundant nested divs/spans
-        simplify_nested_tags(main_content)
-        
-        # Remove empty tags
-        remove_empty_tags(main_content)
+        clean_content_tree(main_content)
         
         # Convert to string and clean up whitespace
         result = str(main_content)
         result = result.replace('\n', '')
         
         # Remove excessive spaces
-        import re
         result = re.sub(r'\s+', ' ', result)
         result = re.sub(r'>\s+<', '><', result)
         result = result.strip()
     else:
         result = ""
     
-    quit_driver(driver)
     return result
 
-def simplify_nested_tags(element):
+def clean_content_tree(root):
     """
-    Remove redundant nested divs/spans that don't add structural value.
-    Only removes tags with a single child of the same type and no direct text.
+    Strips the main content element down to minimal HTML in a single post-order traversal:
+    - script, style and visual elements (img, svg, iframe) are removed
+    - nav/aside/footer/header are removed unless they contain a link
+    - comments are removed
+    - tags outside CLEAN_ALLOWED_TAGS are unwrapped, allowed ones keep only href and id
+    - a div/span whose only child is a tag of the same type is unwrapped
+    - tags without any text are removed
+    The root element itself is kept and loses all its attributes.
+    Each node is visited once, unlike repeated find_all() passes, so the cost stays linear
+    on deeply nested pages.
     """
-    changed = True
-    while changed:
-        changed = False
-        for tag in element.find_all(True):
-            if tag.name in ['div', 'span']:
-                children_tags = [c for c in tag.children if hasattr(c, 'name')]
-                direct_text = ''.join([str(c) for c in tag.children if isinstance(c, str)]).strip()
-                
-                # Only unwrap if there's exactly one child of the same type and no direct text
-                if len(children_tags) == 1 and children_tags[0].name == tag.name and not direct_text:
-                    tag.unwrap()
-                    changed = True
+    # Frame: [tag, children snapshot, next child index, has_link, has_text, pending empty tags]
+    # Empty tags are only removed once their parent is settled: whether a div/span
+    # gets unwrapped depends on its children before empty ones are pruned.
+    stack = [[root, list(root.contents), 0, False, False, []]]
+
+    while stack:
+        frame = stack[-1]
+        tag, children, index = frame[0], frame[1], frame[2]
+
+        if index < len(children):
+            frame[2] += 1
+            child = children[index]
+            if isinstance(child, Tag):
+                if child.name in CLEAN_REMOVED_TAGS:
+                    child.decompose()
+                else:
+                    stack.append([child, list(child.contents), 0, child.name == 'a', False, []])
+            elif isinstance(child, Comment):
+                child.extract()
+            elif type(child) in TEXT_STRING_TYPES and child.strip():
+                frame[4] = True
+            continue
+
+        # Every child of `tag` has been processed
+        stack.pop()
+        _, _, _, has_link, has_text, pending_empty = frame
+
+        if not stack:
+            # Back at the root
+            for empty_tag in pending_empty:
+                empty_tag.decompose()
+            tag.attrs = {}
+            break
+
+        parent_frame = stack[-1]
+
+        # Structural elements without links go away with everything inside them
+        if tag.name in CLEAN_STRUCTURAL_TAGS and not has_link:
+            tag.decompose()
+            continue
+
+        parent_frame[3] = parent_frame[3] or has_link
+        parent_frame[4] = parent_frame[4] or has_text
+
+        if tag.name not in CLEAN_ALLOWED_TAGS:
+            # Children move up to the parent, so do their pending removals
+            tag.unwrap()
+            parent_frame[5].extend(pending_empty)
+            continue
+
+        # Keep only href and id attributes
+        tag.attrs = {attr: tag.attrs[attr] for attr in CLEAN_ALLOWED_ATTRS if attr in tag.attrs}
+
+        # Simplify redundant nested divs/spans: a single child node of the same type
+        contents = tag.contents
+        if tag.name in CLEAN_COLLAPSIBLE_TAGS and len(contents) == 1 and contents[0].name == tag.name:
+            tag.unwrap()
+            parent_frame[5].extend(pending_empty)
+            continue
+
+        if has_text:
+            for empty_tag in pending_empty:
+                empty_tag.decompose()
+        else:
+            # Removed together with this tag, possibly as part of an empty ancestor
+            parent_frame[5].append(tag)
+
+@metrics.timed_stage('markdown')
+def html_to_markdown(content: str) -> str:
+    """
+    Converts cleaned content (the output of clean_page_content) to compact Markdown.
+    Headings, lists, block quotes, code and emphasis are kept; links become
+    reference-style footnotes listed once at the end, so repeated URLs cost a single line.
+    Markdown carries the same information as the cleaned HTML in far fewer tokens.
+
+    Args:
+        content: Cleaned HTML string
+
+    Returns:
+        Markdown string
+    """
+    if not content:
+        return ""
+
+    soup = BeautifulSoup(content, HTML_PARSER)
+    root = soup.body or soup
+    link_numbers = {}
+
+    # inline() and blocks() are generators: instead of recursing into a child they yield
+    # (walker, child, *args) and receive the child's rendering back from walk(), which keeps
+    # the pending walkers on an explicit stack so that deeply nested pages cannot hit the
+    # recursion limit (like clean_content_tree).
+    def inline(node):
+        """Renders the inline content of a node on a single line."""
+        parts = []
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                parts.append(str(child) if type(child) in TEXT_STRING_TYPES else '')
+            else:
+                parts.append((yield inline, child))
+        text = ''.join(parts)
+        name = node.name
+        if name == 'a':
+            href = node.get('href')
+            label = text.strip()
+            if not href or href.startswith(('#', 'javascript:')):
+                return text
+            if not label:
+                label = href
+            number = link_numbers.setdefault(href, len(link_numbers) + 1)
+            return f"[{label}][{number}]"
+        if name == 'strong' and text.strip():
+            return f"**{text.strip()}**"
+        if name == 'em' and text.strip():
+            return f"*{text.strip()}*"
+        if name == 'code':
+            return f"`{text}`"
+        return text
+
+    def blocks(node, depth=0):
+        """Renders a node as a list of Markdown blocks (paragraphs, headings, lists...)."""
+        result = []
+        pending_inline = []
+
+        def flush():
+            text = re.sub(r'\s+', ' ', ''.join(pending_inline)).strip()
+            if text:
+                result.append(text)
+            pending_inline.clear()
+
+        for child in node.children:
+            name = getattr(child, 'name', None)
+            if name is None:
+                pending_inline.append(str(child) if type(child) in TEXT_STRING_TYPES else '')
+                continue
+            if name not in MARKDOWN_BLOCK_TAGS:
+                pending_inline.append((yield inline, child))
+                continue
+
+            flush()
+            if name in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                text = re.sub(r'\s+', ' ', (yield inline, child)).strip()
+                if text:
+                    result.append('#' * int(name[1]) + ' ' + text)
+            elif name in ('ul', 'ol'):
+                items = []
+                for index, item in enumerate(child.find_all('li', recursive=False), start=1):
+                    marker = f"{index}." if name == 'ol' else '-'
+                    item_blocks = yield blocks, item, depth + 1
+                    if not item_blocks:
+                        continue
+                    indent = '  ' * depth
+                    items.append(f"{indent}{marker} {item_blocks[0]}")
+                    items.extend(item_blocks[1:])
+                if items:
+                    result.append('\n'.join(items))
+            elif name == 'pre':
+                result.append(f"```\n{child.get_text().strip()}\n```")
+            elif name == 'blockquote':
+                quoted = '\n\n'.join((yield blocks, child, depth))
+                if quoted:
+                    result.append('\n'.join('> ' + line for line in quoted.split('\n')))
+            else:
+                # p, div, li: containers of further blocks or inline text
+                result.extend((yield blocks, child, depth))
+        flush()
+        return result
+
+    def walk(walker, *args):
+        """Runs a walker to completion, feeding every walker it yields the rendering of its child."""
+        stack = [walker(*args)]
+        value = None
+        while stack:
+            try:
+                request = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+                continue
+            stack.append(request[0](*request[1:]))
+            value = None
+        return value
+
+    markdown = '\n\n'.join(walk(blocks, root))
+    if link_numbers:
+        markdown += '\n\n' + '\n'.join(f"[{number}]: {href}" for href, number in link_numbers.items())
+    return markdown
+
+##############################################
+# DOMAIN POLITENESS (RATE LIMITS SHARED IN REDIS)
+##############################################
+
+# Atomically frees expired concurrency slots, then takes a slot and a token of the domain's
+# bucket. Returns {1, 0} when granted, otherwise {0, seconds to wait before trying again}.
+# KEYS: token bucket hash, concurrency slots sorted set
+# ARGV: now, tokens per second, burst, max concurrency, slot lease, slot holder id, slot poll interval
+DOMAIN_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local max_concurrency = tonumber(ARGV[4])
+local lease = tonumber(ARGV[5])
 
-def remove_empty_tags(element):
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if max_concurrency > 0 and redis.call('ZCARD', KEYS[2]) >= max_concurrency then
+    return {0, ARGV[7]}
+end
+
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or burst)
+local updated_at = tonumber(redis.call('HGET', KEYS[1], 'updated_at') or now)
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    return {0, tostring((1 - tokens) / rate)}
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+redis.call('ZADD', KEYS[2], now + lease, ARGV[6])
+redis.call('EXPIRE', KEYS[2], lease + 60)
+return {1, '0'}
+"""
+
+class DomainThrottled(Exception):
+    """
+    Raised when a domain stays saturated for longer than the caller is willing to wait.
+    Tasks catch it and retry later instead of holding a worker.
+    """
+
+    def __init__(self, domain: str, wait: float):
+        # Keep the raw arguments in args so that the error survives the result backend
+        super().__init__(domain, wait)
+        self.domain = domain
+        self.wait = wait
+
+    def __str__(self):
+        return f"Domain {self.domain} is rate limited, retry in {self.wait:.1f}s"
+
+_domain_acquire_script = None
+
+def politeness_domain(url: str) -> str:
+    """Returns the host that the politeness limits of a URL apply to (lowercased, without 'www.')."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+def domain_delay(domain: str) -> float:
+    """
+    Returns the configured delay in seconds between two requests to a domain:
+    the DOMAIN_DELAYS entry of the domain or of its closest parent, else DOMAIN_DEFAULT_DELAY.
+    """
+    parts = domain.split('.')
+    for index in range(len(parts)):
+        candidate = '.'.join(parts[index:])
+        if candidate in DOMAIN_DELAYS:
+            return DOMAIN_DELAYS[candidate]
+    return DOMAIN_DEFAULT_DELAY
+
+@contextmanager
+def domain_slot(url: str, max_wait: float = DOMAIN_MAX_INLINE_WAIT):
+    """
+    Holds one of the DOMAIN_MAX_CONCURRENCY concurrent slots of the URL's domain, after taking
+    a token of its bucket (one request every domain_delay seconds, bursts of DOMAIN_BURST).
+    Limits are shared by every worker through Redis; slots are leased so that a crashed
+    worker cannot hold one forever. If Redis is unreachable the fetch is not limited.
+
+    Args:
+        url: URL about to be fetched
+        max_wait: Longest time to wait here for the domain before giving up
+
+    Yields:
+        Seconds spent waiting for the domain
+
+    Raises:
+        DomainThrottled: If the domain is not available within max_wait seconds
+    """
+    global _domain_acquire_script
+    domain = politeness_domain(url)
+    delay = domain_delay(domain)
+    if not domain or (delay <= 0 and DOMAIN_MAX_CONCURRENCY <= 0):
+        yield 0.0
+        return
+
+    bucket_key = f"{DOMAIN_REDIS_PREFIX}{domain}:bucket"
+    slots_key = f"{DOMAIN_REDIS_PREFIX}{domain}:slots"
+    holder = f"{os.getpid()}:{threading.get_ident()}:{random_string(8)}"
+    # A delay of 0 disables the token bucket, leaving only the concurrency limit
+    rate = 1 / delay if delay > 0 else 1e9
+    waited = 0.0
+    acquired = False
+
+    try:
+        if _domain_acquire_script is None:
+            _domain_acquire_script = get_redis_client().register_script(DOMAIN_ACQUIRE_SCRIPT)
+        while True:
+            granted, wait = _domain_acquire_script(
+                keys=[bucket_key, slots_key],
+                args=[time.time(), rate, max(1, DOMAIN_BURST), DOMAIN_MAX_CONCURRENCY, DOMAIN_SLOT_LEASE, holder, DOMAIN_SLOT_POLL])
+            if granted:
+                acquired = True
+                break
+            wait = float(wait)
+            if waited + wait > max_wait:
+                raise DomainThrottled(domain, wait)
+            time.sleep(wait)
+            waited += wait
+    except DomainThrottled:
+        raise
+    except Exception as e:
+        print(f"⚠️ Domain politeness check failed, fetching without limits: {e}")
+
+    try:
+        yield round(waited, 2)
+    finally:
+        if acquired:
+            try:
+                get_redis_client().zrem(slots_key, holder)
+            except Exception as e:
+                print(f"⚠️ Could not release politeness slot of {domain}: {e}")
+
+##############################################
+# SINGLE-FLIGHT FETCHES (LEASED REDIS LOCKS)
+##############################################
+
+# Deletes or extends the lock only if it is still held by the caller's token
+SINGLE_FLIGHT_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+SINGLE_FLIGHT_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+def single_flight(key: str, compute, lease: int = SINGLE_FLIGHT_LEASE, wait: int = SINGLE_FLIGHT_WAIT):
+    """
+    Runs `compute` once across all workers for concurrent callers using the same key.
+
+    The first caller takes a Redis lock and computes the value; the lock is a lease renewed
+    while the computation runs, so that it expires quickly if the worker crashes. The other
+    callers wait for the value published by the first one instead of computing it again,
+    and take over the work if the lock expires without a value.
+    Errors are shared with the waiting callers, except DomainThrottled which each caller
+    has to handle itself. If Redis is unreachable, `compute` is simply called.
+
+    Args:
+        key: Identifies the work, e.g. a page cache key
+        compute: Function without arguments returning a JSON serializable value
+        lease: Lock lease in seconds
+        wait: Longest time in seconds to wait for another caller before computing anyway
+
+    Returns:
+        Tuple of (value, role) where role is 'leader', 'coalesced', 'takeover' or 'timeout'
+    """
+    lock_key = f"{SINGLE_FLIGHT_PREFIX}{key}:lock"
+    value_key = f"{SINGLE_FLIGHT_PREFIX}{key}:value"
+    channel = f"{SINGLE_FLIGHT_PREFIX}{key}:done"
+    token = random_string(16)
+
+    try:
+        client = get_redis_client()
+        outcome, role = _wait_for_flight(client, lock_key, value_key, channel, token, lease, wait)
+    except Exception as e:
+        print(f"⚠️ Single-flight coordination failed, fetching directly: {e}")
+        return compute(), 'leader'
+
+    _count_flight(client, role)
+    if role == 'coalesced':
+        if 'error' in outcome:
+            raise RuntimeError(outcome['error'])
+        return outcome['value'], role
+    if role == 'timeout':
+        return compute(), role
+
+    # Leader (or takeover): keep the lease alive while computing, then publish the outcome
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(lease / 3):
+            try:
+                client.eval(SINGLE_FLIGHT_RENEW_SCRIPT, 1, lock_key, token, int(lease * 1000))
+            except Exception as e:
+                print(f"⚠️ Could not renew single-flight lease: {e}")
+
+    threading.Thread(target=renew, name='single-flight-lease', daemon=True).start()
+    try:
+        try:
+            value = compute()
+        except DomainThrottled:
+            raise
+        except Exception as e:
+            _publish_flight(client, value_key, channel, {'error': str(e)})
+            raise
+        _publish_flight(client, value_key, channel, {'value': value})
+        return value, role
+    finally:
+        stop.set()
+        try:
+            client.eval(SINGLE_FLIGHT_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            print(f"⚠️ Could not release single-flight lock: {e}")
+
+def _wait_for_flight(client, lock_key, value_key, channel, token, lease, wait):
+    """
+    Takes the lock of a flight or waits for its outcome.
+    Returns (outcome, 'coalesced') or (None, 'leader' | 'takeover' | 'timeout').
+    """
+    deadline = time.monotonic() + wait
+    pubsub = None
+    try:
+        while True:
+            # The value is always stored before the lock is released, so check it first
+            raw = client.get(value_key)
+            if raw is not None and pubsub is not None:
+                return json.loads(raw), 'coalesced'
+            if client.set(lock_key, token, nx=True, px=int(lease * 1000)):
+                # Outcome of an earlier flight, must not be served to this flight's callers
+                client.delete(value_key)
+                return None, 'leader' if pubsub is None else 'takeover'
+            if pubsub is None:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, 'timeout'
+            # Woken up by the leader's notification, or re-checks the lock every second
+            pubsub.get_message(timeout=min(1.0, remaining))
+    finally:
+        if pubsub is not None:
+            pubsub.close()
+
+def _publish_flight(client, value_key, channel, outcome: dict):
+    """Stores the outcome of a flight for the waiting callers and wakes them up."""
+    try:
+        pipe = client.pipeline()
+        pipe.setex(value_key, SINGLE_FLIGHT_RESULT_TTL, json.dumps(outcome))
+        pipe.publish(channel, '1')
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Could not publish single-flight result: {e}")
+
+def _count_flight(client, role: str):
+    try:
+        client.hincrby(f"{SINGLE_FLIGHT_PREFIX}stats", role, 1)
+    except Exception:
+        pass
+
+def single_flight_stats() -> dict:
+    """
+    Returns the number of single-flight fetches per role since the stats were created:
+    leader (fetched), coalesced (reused another worker's fetch), takeover (the previous
+    leader died) and timeout (waited too long and fetched anyway).
     """
-    Remove tags that contain no text content.
-    Runs multiple times to catch nested empty tags.
+    raw = get_redis_client().hgetall(f"{SINGLE_FLIGHT_PREFIX}stats")
+    return {role.decode(): int(count) for role, count in raw.items()}
+
+##############################################
+# TASK PROGRESS EVENTS (REDIS PUB/SUB)
+##############################################
+
+def task_events_channel(task_id: str) -> str:
+    """Returns the Redis pub/sub channel on which the progress events of a task are published."""
+    return f"{TASK_EVENTS_CHANNEL_PREFIX}{task_id}"
+
+def publish_task_event(task_id: str, event: dict) -> None:
+    """
+    Publishes a progress event of a task to its Redis channel. Events are fire-and-forget:
+    nobody may be listening, and a failed publish never fails the task.
+
+    Args:
+        task_id: Celery task id
+        event: JSON serializable event (state, status, progress and, when finished, result or error)
+    """
+    try:
+        get_redis_client().publish(task_events_channel(task_id), json.dumps(event, default=str))
+    except Exception as e:
+        print(f"⚠️ Could not publish progress of task {task_id}: {e}")
+
+def subscribe_task_events(task_id: str):
+    """
+    Subscribes to the progress events of a task. The caller must close the returned PubSub.
+
+    Returns:
+        redis PubSub subscribed to the task channel
     """
-    changed = True
-    while changed:
-        changed = False
-        for tag in element.find_all(True):
-            if not tag.get_text(strip=True):
-                tag.decompose()
-                changed = True
+    pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(task_events_channel(task_id))
+    return pubsub
+
+##############################################
+# BLOB STORE (LARGE RESULTS)
+##############################################
+
+BLOB_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}\.(' + '|'.join(BLOB_CONTENT_TYPES) + r')$')
+
+def blob_key(data: bytes, extension: str) -> str:
+    """Content-addressed key of a blob: sha256 of its bytes plus the extension giving its content type."""
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+def is_blob_key(key: str) -> bool:
+    return bool(BLOB_KEY_PATTERN.match(key))
+
+class DiskBlobStore:
+    """Stores blobs as files on a local (or shared) volume. Blobs unused for `ttl` seconds are pruned."""
+
+    def __init__(self, directory: str = BLOB_DIR, ttl: int = BLOB_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        if path.exists():
+            # Same content already stored: only extend its lifetime
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so that concurrent readers never see a partial file
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except OSError:
+            return None
+
+    def iter_range(self, key: str, start: int, stop: int):
+        """Yields the bytes [start, stop) of a blob in chunks of BLOB_CHUNK_SIZE."""
+        with open(self._path(key), 'rb') as file:
+            file.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = file.read(min(BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def prune(self):
+        """Removes every blob not written or rewritten for `ttl` seconds."""
+        now = time.time()
+        for path in self.directory.glob('*/*'):
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+class S3BlobStore:
+    """
+    Stores blobs in an S3 bucket, or any S3-compatible store (MinIO) given BLOB_S3_ENDPOINT_URL.
+    Expiry is left to a lifecycle rule of the bucket. Requires boto3, which is only
+    imported when this store is configured.
+    """
+
+    def __init__(self, bucket: str = BLOB_S3_BUCKET):
+        import boto3
+        self.bucket = bucket
+        self.client = boto3.client(
+            's3',
+            endpoint_url=BLOB_S3_ENDPOINT_URL,
+            aws_access_key_id=BLOB_S3_ACCESS_KEY,
+            aws_secret_access_key=BLOB_S3_SECRET_KEY,
+            region_name=BLOB_S3_REGION,
+        )
+
+    def put(self, key: str, data: bytes):
+        if self.size(key) is not None:
+            return
+        content_type = BLOB_CONTENT_TYPES[key.rsplit('.', 1)[1]]
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+
+    def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+        except ClientError:
+            return None
+
+    def iter_range(self, key: str, start: int, stop: int):
+        """Yields the bytes [start, stop) of a blob in chunks of BLOB_CHUNK_SIZE."""
+        if stop <= start:
+            return
+        body = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{stop - 1}")['Body']
+        try:
+            yield from body.iter_chunks(BLOB_CHUNK_SIZE)
+        finally:
+            body.close()
+
+_blob_store = None
+
+def get_blob_store():
+    """
+    Returns the blob store configured by BLOB_STORE ('disk', 's3' or 'none'),
+    or None when large results are kept inline.
+    """
+    global _blob_store
+    if _blob_store is None and BLOB_STORE != 'none':
+        if BLOB_STORE == 's3':
+            _blob_store = S3BlobStore()
+        else:
+            _blob_store = DiskBlobStore()
+    return _blob_store
+
+def offload_content(content: str, content_format: str = 'html') -> Optional[dict]:
+    """
+    Writes content larger than BLOB_THRESHOLD bytes to the blob store so that only a
+    reference travels through the result backend and the web tier.
+
+    Returns:
+        dict with the blob key, its size in bytes and its content type, or None if the
+        content is kept inline (store disabled, small content or store failure)
+    """
+    store = get_blob_store()
+    if store is None:
+        return None
+    data = content.encode('utf-8')
+    if len(data) <= BLOB_THRESHOLD:
+        return None
+
+    extension = 'md' if content_format == 'markdown' else 'html'
+    key = blob_key(data, extension)
+    try:
+        store.put(key, data)
+    except Exception as e:
+        print(f"⚠️ Blob store write failed, keeping the content inline: {e}")
+        return None
+    return {'key': key, 'size': len(data), 'content_type': BLOB_CONTENT_TYPES[extension]}
+
+def prune_disk_caches():
+    """Removes the expired entries of the page cache and of the blob store when they are kept on disk."""
+    stores = []
+    if PAGE_CACHE_BACKEND == 'disk':
+        stores.append(('page cache', get_page_cache()))
+    if BLOB_STORE == 'disk':
+        stores.append(('blob store', get_blob_store()))
+    for name, store in stores:
+        try:
+            store.prune()
+        except Exception as e:
+            print(f"⚠️ Could not prune the {name}: {e}")
+
+def start_cache_pruner(interval: int = CACHE_PRUNE_INTERVAL):
+    """
+    Prunes the disk caches now and then every `interval` seconds from a background thread.
+    Does nothing when no cache is kept on disk. Several processes may prune the same
+    shared directory, removing an already removed file is harmless.
+    """
+    if interval <= 0 or (PAGE_CACHE_BACKEND != 'disk' and BLOB_STORE != 'disk'):
+        return
+
+    def run():
+        while True:
+            prune_disk_caches()
+            time.sleep(interval)
+
+    threading.Thread(target=run, name='cache-pruner', daemon=True).start()
+    print(f"🧹 Pruning the disk caches every {interval}s")
+
+
+##############################################
+# COMPLETION WEBHOOKS
+##############################################
+
+def is_public_address(address: str) -> bool:
+    """Tells whether an IP address is globally routable (not loopback, private, link-local, reserved...)."""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def resolve_callback_address(url: str) -> str:
+    """
+    Resolves the host of a callback URL and checks that none of its addresses is internal,
+    so that webhooks cannot be aimed at the services of the private network (SSRF).
+
+    Returns:
+        The first resolved address, to connect to
+
+    Raises:
+        ValueError: If the URL is not an absolute http(s) URL, its host cannot be resolved
+            or resolves to an internal address
+    """
+    parsed = urlparse(url) if isinstance(url, str) else None
+    if not parsed or parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("'callback_url' must be an absolute http(s) URL")
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        infos = socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+    except (ValueError, socket.gaierror, UnicodeError):
+        raise ValueError(f"'callback_url' host '{parsed.hostname}' cannot be resolved")
+
+    addresses = [info[4][0] for info in infos]
+    if not WEBHOOK_ALLOW_PRIVATE_ADDRESSES:
+        for address in addresses:
+            if not is_public_address(address):
+                raise ValueError(f"'callback_url' must not point to an internal address ({address})")
+    return addresses[0]
+
+def validate_callback_url(url) -> str:
+    """
+    Checks that a webhook callback URL is an absolute http(s) URL of a public host.
+    The host is checked again when the webhook is delivered (see post_webhook).
+
+    Returns:
+        The URL
+
+    Raises:
+        ValueError: If the URL cannot receive webhooks
+    """
+    resolve_callback_address(url)
+    return url
+
+class PinnedAddressAdapter(HTTPAdapter):
+    """
+    Transport adapter for URLs whose host was replaced by an IP address: TLS still uses
+    the original hostname for SNI and certificate verification.
+    """
+
+    def __init__(self, hostname: str, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['server_hostname'] = self.hostname
+        kwargs['assert_hostname'] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+def sign_webhook(body: bytes, secret: str, timestamp: str) -> str:
+    """
+    Computes the signature of a webhook body: HMAC-SHA256 of "<timestamp>.<body>" with the
+    secret given by the client. Signing the timestamp lets receivers reject replayed deliveries.
+    """
+    digest = hmac.new(secret.encode('utf-8'), timestamp.encode('utf-8') + b'.' + body, hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+def post_webhook(url: str, payload: dict, secret: Optional[str] = None) -> requests.Response:
+    """
+    POSTs a JSON payload to a webhook URL.
+    When a secret is given, the X-Crawlic-Timestamp and X-Crawlic-Signature headers are added.
+    The host is resolved and checked right before sending and the request is sent to the
+    checked address, so that a DNS answer changed since validate_callback_url (DNS rebinding)
+    cannot redirect it to an internal service.
+
+    Args:
+        url: Callback URL of the client
+        payload: JSON serializable payload
+        secret: Optional HMAC signing secret of the client
+
+    Returns:
+        The HTTP response (redirects are not followed)
+
+    Raises:
+        ValueError: If the callback URL points to an internal address
+        requests.exceptions.RequestException: If the request could not be sent
+    """
+    address = resolve_callback_address(url)
+    parsed = urlparse(url)
+    host = f"[{address}]" if ':' in address else address
+    pinned_url = urlunparse(parsed._replace(netloc=f"{host}:{parsed.port}" if parsed.port else host))
+
+    body = json.dumps(payload, default=str).encode('utf-8')
+    headers = {
+        'Host': parsed.netloc.rsplit('@', 1)[-1],
+        'Content-Type': 'application/json',
+        'User-Agent': WEBHOOK_USER_AGENT,
+    }
+    if payload.get('task_id'):
+        headers['X-Crawlic-Task-Id'] = payload['task_id']
+    if secret:
+        timestamp = str(int(time.time()))
+        headers['X-Crawlic-Timestamp'] = timestamp
+        headers['X-Crawlic-Signature'] = sign_webhook(body, secret, timestamp)
+
+    auth = (unquote(parsed.username), unquote(parsed.password or '')) if parsed.username else None
+
+    # A session per delivery: the pooled sessions would reuse connections by IP for other hostnames
+    with requests.Session() as session:
+        session.trust_env = False  # a proxy from the environment would resolve the host again
+        if parsed.scheme == 'https':
+            session.mount('https://', PinnedAddressAdapter(parsed.hostname))
+        return session.post(pinned_url, data=body, headers=headers, auth=auth, timeout=WEBHOOK_TIMEOUT,
+                            allow_redirects=False)
+
+def webhook_retry_delay(retries: int) -> float:
+    """Exponential backoff with jitter before the next delivery attempt of a webhook."""
+    delay = min(WEBHOOK_RETRY_BACKOFF * (2 ** retries), WEBHOOK_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
 
 ##############################################
 # GENERAL FUNCTIONS
@@ -572,7 +2717,7 @@ def is_valid_json(
     input_data: Union[str, dict],
     required_keys: Optional[List[str]] = None,
     optional_keys: Optional[List[str]] = None,
-    key_types: Optional[Dict[str, type]] = None,
+    key_types: Optional[Dict[str, Any]] = None,
     strict: bool = False) -> tuple[bool, Optional[str]]:
     """
     Validates if input is valid JSON with correct format.
@@ -581,7 +2726,10 @@ def is_valid_json(
         input_data: String to parse as JSON or dict to validate
         required_keys: List of keys that must be present
         optional_keys: List of keys that may be present (only checked if strict=True)
-        key_types: Dict mapping key names to expected types (e.g., {'name': str, 'age': int})
+        key_types: Dict mapping key names to expected types (e.g., {'name': str, 'age': int}).
+            A type may also be a tuple of types, a dict of key types for a nested object
+            (e.g., {'address': {'city': str}}) or a one-element list for the items of a list
+            (e.g., {'tags': [str]}). In strict mode nested objects must have exactly the keys of their dict.
         strict: If True, only required_keys and optional_keys are allowed
     
     Returns:
@@ -618,13 +2766,60 @@ def is_valid_json(
         if unexpected_keys:
             return False, f"Unexpected keys: {', '.join(unexpected_keys)}"
     
-    # Step 5: Check key types
+    # Step 5: Check key types, nested objects and lists included
     if key_types:
         for key, expected_type in key_types.items():
             if key in data:
-                if not isinstance(data[key], expected_type):
-                    actual_type = type(data[key]).__name__
-                    expected_type_name = expected_type.__name__
-                    return False, f"Key '{key}' has wrong type: expected {expected_type_name}, got {actual_type}"
+                error = check_json_type(data[key], expected_type, key, strict)
+                if error:
+                    return False, error
     
-    return True, None
\ No newline at end of file
+    return True, None
+
+def check_json_type(value, expected_type, path: str, strict: bool = False) -> Optional[str]:
+    """
+    Checks a JSON value against an expected type of is_valid_json's key_types.
+
+    Returns:
+        None if the value matches, otherwise a description of the first mismatch with its key path
+    """
+    if isinstance(expected_type, dict):
+        if not isinstance(value, dict):
+            return f"Key '{path}' has wrong type: expected object, got {type(value).__name__}"
+        if strict:
+            missing_keys = set(expected_type) - set(value)
+            if missing_keys:
+                return f"Key '{path}' is missing keys: {', '.join(sorted(missing_keys))}"
+            unexpected_keys = set(value) - set(expected_type)
+            if unexpected_keys:
+                return f"Key '{path}' has unexpected keys: {', '.join(sorted(unexpected_keys))}"
+        for key, item_type in expected_type.items():
+            if key in value:
+                error = check_json_type(value[key], item_type, f"{path}.{key}", strict)
+                if error:
+                    return error
+        return None
+
+    if isinstance(expected_type, list):
+        if not isinstance(value, list):
+            return f"Key '{path}' has wrong type: expected list, got {type(value).__name__}"
+        if expected_type:
+            for index, item in enumerate(value):
+                error = check_json_type(item, expected_type[0], f"{path}[{index}]", strict)
+                if error:
+                    return error
+        return None
+
+    expected_types = expected_type if isinstance(expected_type, tuple) else (expected_type,)
+    # Flatten nested tuples such as ((int, float), type(None))
+    while any(isinstance(t, tuple) for t in expected_types):
+        expected_types = tuple(t for item in expected_types for t in (item if isinstance(item, tuple) else (item,)))
+    # JSON booleans are not numbers, although bool is a subclass of int in Python
+    if isinstance(value, bool) and bool not in expected_types:
+        matches = False
+    else:
+        matches = isinstance(value, expected_types)
+    if not matches:
+        expected_type_name = ' or '.join(t.__name__ for t in expected_types)
+        return f"Key '{path}' has wrong type: expected {expected_type_name}, got {type(value).__name__}"
+    return None
\ No newline at end of file
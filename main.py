@@ -1,4 +1,5 @@
 # General imports
+from collections import OrderedDict
 from datetime import datetime
 import secrets
 from functools import wraps
@@ -6,19 +7,25 @@ from urllib.parse import quote_plus
 import json
 import os
 import time
+import atexit
+import threading
+import zlib
 
 # flask imports
 from flask_swagger_ui import get_swaggerui_blueprint
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 
 # Celery imports
+from celery import group, states
+from celery.result import GroupResult
 import celery_app as celery_app
 
 # App imports
 import common as common
 import ai as ai
+import metrics as metrics
 
 # Flask app config
 app = Flask(__name__)
@@ -70,6 +77,133 @@ with app.app_context():
 # Authentification Endpoints and wrappers
 ########################################
 
+# Valid API keys are cached in memory so that authentication stays off the database,
+# and usage counts are accumulated and written to Client.usage_count in bulk.
+API_KEY_CACHE_TTL = int(os.getenv('API_KEY_CACHE_TTL', '300'))
+API_KEY_NEGATIVE_CACHE_TTL = int(os.getenv('API_KEY_NEGATIVE_CACHE_TTL', '30'))
+API_KEY_CACHE_SIZE = int(os.getenv('API_KEY_CACHE_SIZE', '10000'))
+API_KEY_NEGATIVE_CACHE_SIZE = int(os.getenv('API_KEY_NEGATIVE_CACHE_SIZE', '10000'))
+USAGE_FLUSH_INTERVAL = int(os.getenv('USAGE_FLUSH_INTERVAL', '10'))
+
+# Bounded LRU caches: api key -> (client id or None if invalid, expiry timestamp).
+# Invalid keys have their own cache so that a client trying random keys cannot evict valid ones.
+api_key_cache = OrderedDict()
+invalid_api_key_cache = OrderedDict()
+api_key_cache_lock = threading.Lock()
+
+pending_usage = {}  # client id -> requests not yet written to the database
+pending_usage_lock = threading.Lock()
+usage_flusher_pid = None
+
+
+def lookup_client_id(key):
+    """
+    Returns the id of the client owning the API key, or None if the key is invalid.
+    Both valid and invalid keys are cached, invalid ones for a shorter time.
+    """
+    now = time.monotonic()
+    with api_key_cache_lock:
+        for cache in (api_key_cache, invalid_api_key_cache):
+            cached = cache.get(key)
+            if cached is None:
+                continue
+            if cached[1] > now:
+                cache.move_to_end(key)
+                return cached[0]
+            del cache[key]
+
+    client = Client.query.filter_by(api_key=key).first()
+    client_id = client.id if client else None
+    if client_id is not None:
+        cache, ttl, max_size = api_key_cache, API_KEY_CACHE_TTL, API_KEY_CACHE_SIZE
+    else:
+        cache, ttl, max_size = invalid_api_key_cache, API_KEY_NEGATIVE_CACHE_TTL, API_KEY_NEGATIVE_CACHE_SIZE
+
+    with api_key_cache_lock:
+        cache[key] = (client_id, now + ttl)
+        cache.move_to_end(key)
+        # Least recently used first: drop the expired entries at the front, then any beyond the size limit
+        while cache and (len(cache) > max_size or next(iter(cache.values()))[1] <= now):
+            cache.popitem(last=False)
+    return client_id
+
+
+def invalidate_api_key(key=None):
+    """
+    Drops an API key from the authentication cache, or every key if none is given.
+    Must be called whenever a key is created, revoked or reassigned.
+    """
+    with api_key_cache_lock:
+        for cache in (api_key_cache, invalid_api_key_cache):
+            if key is None:
+                cache.clear()
+            else:
+                cache.pop(key, None)
+
+
+def record_usage(client_id, count=1):
+    """
+    Counts `count` uses (one per request, one per queued task for batches) for a client.
+    The count is written to the database by the usage flusher.
+    """
+    start_usage_flusher()
+    with pending_usage_lock:
+        pending_usage[client_id] = pending_usage.get(client_id, 0) + count
+
+
+def flush_usage_counts():
+    """
+    Writes the accumulated usage counts to Client.usage_count in a single transaction.
+    Counts are put back if the write fails so that no usage is lost.
+    """
+    global pending_usage
+    with pending_usage_lock:
+        counts, pending_usage = pending_usage, {}
+    if not counts:
+        return
+
+    with app.app_context():
+        try:
+            for client_id, count in counts.items():
+                db.session.execute(
+                    db.update(Client)
+                    .where(Client.id == client_id)
+                    .values(usage_count=db.func.coalesce(Client.usage_count, 0) + count)
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Could not flush usage counts: {e}")
+            with pending_usage_lock:
+                for client_id, count in counts.items():
+                    pending_usage[client_id] = pending_usage.get(client_id, 0) + count
+
+
+def start_usage_flusher():
+    """
+    Starts the background thread that flushes usage counts every USAGE_FLUSH_INTERVAL seconds.
+    Started lazily so that each gunicorn worker process gets its own thread after the fork.
+    """
+    global usage_flusher_pid
+    if usage_flusher_pid == os.getpid():
+        return
+    with pending_usage_lock:
+        if usage_flusher_pid == os.getpid():
+            return
+        usage_flusher_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(USAGE_FLUSH_INTERVAL)
+            flush_usage_counts()
+
+    threading.Thread(target=run, name='usage-flusher', daemon=True).start()
+
+
+# Write the remaining counts when the process exits
+atexit.register(flush_usage_counts)
+
+
 def require_api_key(func):
     """
     Decorator to require API key authentication for endpoints.
@@ -84,12 +218,13 @@ def require_api_key(func):
             return jsonify({"msg": "Missing API key"}), 401
 
         key = auth.split(" ")[1]
-        client = Client.query.filter_by(api_key=key).first()
-        if not client:
+        client_id = lookup_client_id(key)
+        if client_id is None:
             return jsonify({"msg": "Invalid API key"}), 403
 
-        client.usage_count += 1
-        db.session.commit()
+        record_usage(client_id)
+        # Endpoints queuing several tasks count the extra ones (see create_batch)
+        g.client_id = client_id
 
         return func(*args, **kwargs)
     return wrapper
@@ -116,6 +251,9 @@ def register():
     db.session.add(client)
     db.session.commit()
 
+    # The key may have been cached as invalid by an earlier request
+    invalidate_api_key(key)
+
     return jsonify(
         {
             "message": "Client registered successfully",
@@ -139,54 +277,130 @@ def get_task_status(task_id):
     Returns task state and result if completed.
     """
     task = celery_app.celery.AsyncResult(task_id)
-    
-    if task.state == 'PENDING':
-        response = {
-            'state': task.state,
-            'status': 'Task is waiting in queue...',
-            'progress': 0
-        }
-    elif task.state == 'STARTED':
-        response = {
-            'state': task.state,
-            'status': 'Task is processing...',
-            'progress': 30
-        }
-    elif task.state == 'PROGRESS':
-        response = {
-            'state': task.state,
-            'status': task.info.get('status', 'Processing...'),
-            'progress': 60
-        }
-    elif task.state == 'SUCCESS':
-        result = task.result
-        response = {
-            'state': task.state,
-            'status': 'Task completed successfully',
-            'progress': 100,
-            'result': result
-        }
-    elif task.state == 'FAILURE':
-        response = {
-            'state': task.state,
-            'success': False,
-            'status': 'Task failed',
-            'error': str(task.info),
-            'progress': 0
-        }
-    else:
-        response = {
-            'state': task.state,
-            'status': str(task.info),
-            'progress': 0
-        }
+    response = celery_app.describe_task_state(task.state, task.info)
+
+    # Size of the stored result and memory saved by the compact serializer
+    storage = celery_app.payload_storage()
+    if storage is not None and task.state == states.SUCCESS:
+        response['storage'] = storage
     
     return jsonify(response)
 
+
+# Open event streams of this process (see common.TASK_EVENTS_MAX_STREAMS)
+event_stream_slots = threading.BoundedSemaphore(common.TASK_EVENTS_MAX_STREAMS)
+
+
+def format_sse(event, name=None):
+    """Formats a payload as a server-sent event."""
+    message = f"event: {name}\n" if name else ''
+    return message + f"data: {json.dumps(event)}\n\n"
+
+
+@app.route('/api/task/<task_id>/events', methods=['GET'])
+@require_api_key
+def stream_task_events(task_id):
+    """
+    Server-sent events stream of a task: one event per state transition and stage
+    published by the worker, ending with the final result. Replaces polling /api/task/<id>.
+    Answers 503 with Retry-After when this worker already serves TASK_EVENTS_MAX_STREAMS streams.
+    """
+    if not event_stream_slots.acquire(blocking=False):
+        return jsonify({
+            "success": False,
+            "error": f"Too many open event streams, retry later or poll /api/task/{task_id}"
+        }), 503, {'Retry-After': str(common.TASK_EVENTS_RETRY_AFTER)}
+
+    def generate():
+        # Subscribe before reading the current state so that no transition is missed in between
+        pubsub = common.subscribe_task_events(task_id)
+        try:
+            task = celery_app.celery.AsyncResult(task_id)
+            event = celery_app.describe_task_state(task.state, task.info)
+            yield format_sse(event)
+            if event['state'] in states.READY_STATES:
+                return
+
+            deadline = time.monotonic() + common.TASK_EVENTS_TIMEOUT
+            while time.monotonic() < deadline:
+                message = pubsub.get_message(timeout=common.TASK_EVENTS_KEEPALIVE)
+                if message is None:
+                    # Comment line: keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+
+                event = json.loads(message['data'])
+                yield format_sse(event)
+                if event['state'] in states.READY_STATES:
+                    return
+
+            yield format_sse({'status': f'Stream timed out, poll /api/task/{task_id} for the result'}, name='timeout')
+        finally:
+            pubsub.close()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Called once the response is closed, also when the client disconnects before the first event
+    response.call_on_close(event_stream_slots.release)
+    return response
+
 ########################################
 # Scraping Endpoints (Async with Celery)
 ########################################
 
+# Optional payload fields forwarded to common.get_source_content
+FETCH_OPTION_KEYS = ['wait_selector', 'render', 'max_age', 'no_cache', 'content_format', 'block_profile']
+
+def get_fetch_options(data):
+    """
+    Extracts the optional page fetching options from a request payload.
+    RETURNS:
+        dict of the fetch options present in the payload.
+    """
+    fetch_options = {key: data[key] for key in FETCH_OPTION_KEYS if data.get(key) is not None}
+
+    if 'render' in fetch_options and fetch_options['render'] not in common.RENDER_MODES:
+        raise ValueError(f"'render' must be one of: {', '.join(common.RENDER_MODES)}")
+
+    if 'content_format' in fetch_options and fetch_options['content_format'] not in common.CONTENT_FORMATS:
+        raise ValueError(f"'content_format' must be one of: {', '.join(common.CONTENT_FORMATS)}")
+
+    if 'block_profile' in fetch_options and fetch_options['block_profile'] not in common.BLOCK_PROFILES:
+        raise ValueError(f"'block_profile' must be one of: {', '.join(common.BLOCK_PROFILES)}")
+
+    if 'max_age' in fetch_options:
+        max_age = fetch_options['max_age']
+        if isinstance(max_age, bool) or not isinstance(max_age, (int, float)) or max_age < 0:
+            raise ValueError("'max_age' must be a non-negative number of seconds")
+
+    if 'no_cache' in fetch_options and not isinstance(fetch_options['no_cache'], bool):
+        raise ValueError("'no_cache' must be a boolean")
+
+    return fetch_options
+
+
+def get_callback_options(data):
+    """
+    Extracts the optional completion webhook of a request payload
+    ('callback_url' and its HMAC signing secret 'callback_secret').
+    RETURNS:
+        dict of apply_async options delivering the task outcome to the callback URL,
+        empty when no callback was requested.
+    """
+    callback_url = data.get('callback_url')
+    if callback_url is None:
+        return {}
+
+    common.validate_callback_url(callback_url)
+    callback_secret = data.get('callback_secret')
+    if callback_secret is not None and not isinstance(callback_secret, str):
+        raise ValueError("'callback_secret' must be a string")
+
+    return celery_app.webhook_options(callback_url, callback_secret)
+
 
 @app.route('/api/page-content', methods=['POST'])
 @require_api_key
@@ -204,9 +418,11 @@ def get_page_content():
             }), 400
 
         link = data["link"]
+        fetch_options = get_fetch_options(data)
 
         # Queue the task
-        task = celery_app.scrape_page_content_task.apply_async(args=[link])
+        task = celery_app.scrape_page_content_task.apply_async(
+            args=[link], kwargs={"fetch_options": fetch_options}, **get_callback_options(data))
 
         return jsonify({
             "success": True,
@@ -215,6 +431,12 @@ def get_page_content():
             "message": "Task queued successfully. Use task_id to check status."
         }), 202
     
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+
     except Exception as e:
         return jsonify({
             "success": False,
@@ -235,8 +457,9 @@ def describe_page():
             }), 400
 
         link = data["link"]
+        fetch_options = get_fetch_options(data)
 
-        task = celery_app.scrape_page_content_task.apply_async(args=[link])
+        task = celery_app.describe_page(link, fetch_options).apply_async(**get_callback_options(data))
 
         return jsonify({
             "success": True,
@@ -245,6 +468,12 @@ def describe_page():
             "message": "Task queued successfully. Use task_id to check status."
         }), 202
     
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+
     except Exception as e:
         # In production, log the error instead of exposing str(e)
         return jsonify({
@@ -268,8 +497,10 @@ def custom_page_content():
         link = data['link']
         user_query = data['user_query']
         output_format = data['output_format']
+        fetch_options = get_fetch_options(data)
 
-        task = celery_app.custom_page_content_task.apply_async(args=[link, output_format, user_query])
+        task = celery_app.custom_page_content(link, output_format, user_query, fetch_options).apply_async(
+            **get_callback_options(data))
 
         return jsonify({
             "success": True,
@@ -278,6 +509,9 @@ def custom_page_content():
             "message": "Task queued successfully. Use task_id to check status."
         }), 202
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -294,8 +528,10 @@ def get_answer_from_page():
     
         link = data['link']
         user_query = data['user_query']
+        fetch_options = get_fetch_options(data)
 
-        task = celery_app.get_answer_from_page_task.apply_async(args=[link, user_query])
+        task = celery_app.get_answer_from_page(link, user_query, fetch_options).apply_async(
+            **get_callback_options(data))
 
         return jsonify({
             "success": True,
@@ -304,6 +540,9 @@ def get_answer_from_page():
             "message": "Task queued successfully. Use task_id to check status."
         }), 202
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
         
@@ -318,7 +557,7 @@ def find_contact_email():
     
         link = data['link']
 
-        task = celery_app.find_contact_email_task.apply_async(args=[link])
+        task = celery_app.find_contact_email_task.apply_async(args=[link], **get_callback_options(data))
 
         return jsonify({
             "success": True,
@@ -327,9 +566,282 @@ def find_contact_email():
             "message": "Task queued successfully. Use task_id to check status."
         }), 202
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+########################################
+# Batch Endpoints (many links as one Celery group)
+########################################
+
+# Task type accepted by /api/batch -> (signature builder, required item fields, accepts fetch options)
+BATCH_TASKS = {
+    'page-content': (celery_app.scrape_page_content_task.s, ['link'], True),
+    'describe-page': (celery_app.describe_page, ['link'], True),
+    'get-answer-from-page': (celery_app.get_answer_from_page, ['link', 'user_query'], True),
+    'custom-page-content': (celery_app.custom_page_content, ['link', 'output_format', 'user_query'], True),
+    'find-contact-email': (celery_app.find_contact_email_task.s, ['link'], False),
+}
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '5000'))
+BATCH_PAGE_MAX_SIZE = 500
+
+
+def build_batch_signatures(data):
+    """
+    Validates a batch payload and builds one Celery signature per item.
+    Items are either objects in 'items' or plain URLs in 'links'; fields given at the
+    top level of the payload (user_query, output_format, fetch options, callback) apply to every item.
+    RETURNS:
+        list of Celery signatures, raises ValueError if the payload is invalid.
+    """
+    task_type = data.get('task')
+    if task_type not in BATCH_TASKS:
+        raise ValueError(f"'task' must be one of: {', '.join(BATCH_TASKS)}")
+    build_signature, required_fields, accepts_fetch_options = BATCH_TASKS[task_type]
+
+    if 'items' in data:
+        items = data['items']
+    elif 'links' in data:
+        items = [{'link': link} for link in data['links']] if isinstance(data['links'], list) else None
+    else:
+        raise ValueError("Missing 'items' or 'links' in request payload")
+
+    if not isinstance(items, list) or not items:
+        raise ValueError("'items'/'links' must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"A batch cannot contain more than {BATCH_MAX_ITEMS} items")
+
+    shared_fields = {field: data[field] for field in required_fields if field in data}
+    shared_fetch_options = get_fetch_options(data)
+
+    signatures = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"Item {index} must be an object")
+        fields = dict(shared_fields, **item)
+        missing = [field for field in required_fields if field not in fields]
+        if missing:
+            raise ValueError(f"Item {index} is missing: {', '.join(missing)}")
+
+        args = [fields[field] for field in required_fields]
+        kwargs = {}
+        if accepts_fetch_options:
+            kwargs['fetch_options'] = dict(shared_fetch_options, **get_fetch_options(item))
+        # A callback given at the top level is delivered once per item, unless the item overrides it
+        callback = {key: item.get(key, data.get(key)) for key in ('callback_url', 'callback_secret')}
+        callback_options = get_callback_options(callback)
+        signature = build_signature(*args, **kwargs).set(**callback_options)
+        if 'task_id' in callback_options:
+            # A group gives new ids to the chains it contains: pin the id the webhook payload carries
+            signature.freeze(callback_options['task_id'])
+        signatures.append(signature)
+
+    return signatures
+
+
+def restore_batch(batch_id):
+    """
+    Loads a batch saved by /api/batch from the result backend.
+    RETURNS:
+        GroupResult, or None if the batch does not exist or has expired.
+    """
+    return GroupResult.restore(batch_id, app=celery_app.celery)
+
+
+def fetch_task_metas(task_ids):
+    """
+    Reads the state and result of many tasks from the result backend in one round trip.
+    RETURNS:
+        list of dicts with task_id, state and (when finished) result, in the order of task_ids.
+    """
+    backend = celery_app.celery.backend
+    raw_metas = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+
+    metas = []
+    for task_id, raw_meta in zip(task_ids, raw_metas):
+        meta = backend.decode_result(raw_meta) if raw_meta else {'status': 'PENDING', 'result': None}
+        entry = {'task_id': task_id, 'state': meta['status']}
+        if meta['status'] == 'SUCCESS':
+            entry['result'] = meta['result']
+        elif meta['status'] == 'FAILURE':
+            entry['error'] = str(meta['result'])
+        metas.append(entry)
+    return metas
+
+
+def iter_batch_task_metas(task_ids):
+    """Yields the metas of every task of a batch, reading the backend in pages."""
+    for start in range(0, len(task_ids), BATCH_PAGE_MAX_SIZE):
+        yield from fetch_task_metas(task_ids[start:start + BATCH_PAGE_MAX_SIZE])
+
+
+@app.route('/api/batch', methods=['POST'])
+@require_api_key
+def create_batch():
+    """
+    Queue many tasks of the same type as a single Celery group.
+    Returns immediately with a batch_id for progress and result checking.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "error": "Missing request payload"}), 400
+
+        signatures = build_batch_signatures(data)
+        batch = group(signatures).apply_async()
+        # Persist the group so that the batch can be restored from its id by later requests
+        batch.save()
+        # One use per queued item, the request itself was counted by require_api_key
+        record_usage(g.client_id, len(signatures) - 1)
+
+        return jsonify({
+            "success": True,
+            "batch_id": batch.id,
+            "size": len(signatures),
+            "status_url": f"/api/batch/{batch.id}",
+            "results_url": f"/api/batch/{batch.id}/results",
+            "message": "Batch queued successfully. Use batch_id to check progress."
+        }), 202
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+@require_api_key
+def get_batch_status(batch_id):
+    """
+    Aggregate progress of a batch: number of tasks per state and overall percentage.
+    """
+    batch = restore_batch(batch_id)
+    if batch is None:
+        return jsonify({"success": False, "error": "Unknown or expired batch"}), 404
+
+    task_ids = [result.id for result in batch.results]
+    states = {}
+    for meta in iter_batch_task_metas(task_ids):
+        states[meta['state']] = states.get(meta['state'], 0) + 1
+
+    finished = states.get('SUCCESS', 0) + states.get('FAILURE', 0) + states.get('REVOKED', 0)
+    total = len(task_ids)
+
+    return jsonify({
+        'batch_id': batch_id,
+        'total': total,
+        'finished': finished,
+        'states': states,
+        'progress': round(finished * 100 / total) if total else 100,
+        'completed': finished == total
+    })
+
+
+@app.route('/api/batch/<batch_id>/results', methods=['GET'])
+@require_api_key
+def get_batch_results(batch_id):
+    """
+    Paginated listing of the tasks of a batch with their results (?offset=0&limit=100).
+    With ?format=ndjson every task of the batch is streamed as one JSON line instead.
+    """
+    batch = restore_batch(batch_id)
+    if batch is None:
+        return jsonify({"success": False, "error": "Unknown or expired batch"}), 404
+
+    task_ids = [result.id for result in batch.results]
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for meta in iter_batch_task_metas(task_ids):
+                yield json.dumps(meta) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 100)), 1), BATCH_PAGE_MAX_SIZE)
+    except ValueError:
+        return jsonify({"success": False, "error": "'offset' and 'limit' must be integers"}), 400
+
+    page_ids = task_ids[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(task_ids) else None
+
+    return jsonify({
+        'batch_id': batch_id,
+        'total': len(task_ids),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset,
+        'results': fetch_task_metas(page_ids) if page_ids else []
+    })
+
+########################################
+# Blob Downloads (large results offloaded by the tasks)
+########################################
+
+def gzip_stream(chunks):
+    """Compresses a stream of byte chunks into a gzip stream, without buffering the whole content."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.route('/api/blobs/<key>', methods=['GET'])
+@require_api_key
+def download_blob(key):
+    """
+    Streams a blob referenced by a task result (content_blob.url) from the blob store.
+    Supports single byte ranges (206 Partial Content) and gzip compression of full downloads;
+    blobs are content-addressed, so the key is also a strong ETag (suffixed with -gz for the
+    gzip encoding). Multiple ranges are not supported: the full blob is sent instead.
+    """
+    store = common.get_blob_store()
+    if store is None or not common.is_blob_key(key):
+        return jsonify({"success": False, "error": "Unknown blob"}), 404
+    size = store.size(key)
+    if size is None:
+        return jsonify({"success": False, "error": "Unknown or expired blob"}), 404
+
+    single_range = request.range is not None and len(request.range.ranges) == 1
+    use_gzip = not single_range and bool(request.accept_encodings['gzip'])
+    etag = f"{key}-gz" if use_gzip else key
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'private, max-age=86400, immutable',
+        'Vary': 'Accept-Encoding',
+    }
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    content_type = common.BLOB_CONTENT_TYPES[key.rsplit('.', 1)[1]]
+
+    if single_range:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            return Response(status=416, headers=dict(headers, **{'Content-Range': f"bytes */{size}"}))
+        start, stop = byte_range
+        headers.update({'Content-Range': f"bytes {start}-{stop - 1}/{size}", 'Content-Length': str(stop - start)})
+        return Response(store.iter_range(key, start, stop), status=206, headers=headers,
+                        content_type=content_type, direct_passthrough=True)
+
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(gzip_stream(store.iter_range(key, 0, size)), headers=headers,
+                        content_type=content_type, direct_passthrough=True)
+
+    headers['Content-Length'] = str(size)
+    return Response(store.iter_range(key, 0, size), headers=headers,
+                    content_type=content_type, direct_passthrough=True)
+
+
 ########################################
 # Health Check
 ########################################
@@ -337,11 +849,48 @@ def find_contact_email():
 @app.route('/api/health', methods=['GET'])
 def health():
     """Check if the API is running"""
+    try:
+        single_flight = common.single_flight_stats()
+    except Exception as e:
+        single_flight = {'error': str(e)}
+
     return jsonify({
         'status': 'healthy',
-        'redis': os.getenv('REDIS_URL', 'not configured')
+        'redis': os.getenv('REDIS_URL', 'not configured'),
+        # Page fetches done by a leader vs coalesced into another task's fetch
+        'single_flight': single_flight
     }), 200
 
+
+########################################
+# Metrics
+########################################
+
+@app.before_request
+def start_request_timer():
+    request.metrics_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    """Records the duration of every API request, labelled by route pattern rather than URL."""
+    start = getattr(request, 'metrics_start', None)
+    if start is not None and request.url_rule is not None and request.path.startswith('/api/'):
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            method=request.method, endpoint=request.url_rule.rule, status=response.status_code
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus metrics of the web tier (and of the pipeline stages it runs inline).
+    Served outside /api so that it is only reachable on the internal network.
+    """
+    payload, content_type = metrics.export()
+    return Response(payload, mimetype=content_type)
+
     
 if __name__ == "__main__":
     print("Starting Flask app with Celery + Redis...")
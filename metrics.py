@@ -0,0 +1,143 @@
+"""
+Prometheus metrics of the scraping pipeline, shared by the web tier and the Celery workers.
+
+The web tier serves them on /metrics (see main.py) and every Celery worker on its own
+METRICS_PORT (see celery_app.py). When PROMETHEUS_MULTIPROC_DIR is set, the values of all
+the processes of a gunicorn or prefork Celery worker are aggregated through that directory.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+    start_http_server)
+
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# From 5ms (parsing a small page) to 5 minutes (task time limit)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+########################################
+# Metric Definitions
+########################################
+
+# Pipeline stages: driver_launch, driver_quit, navigation, page_ready, http_fetch,
+# browser_fetch, parse, clean, markdown, domain_wait
+STAGE_SECONDS = Histogram(
+    'crawlic_stage_seconds', 'Duration of a stage of the scraping pipeline', ['stage'], buckets=STAGE_BUCKETS)
+
+DRIVER_POOL_EVENTS = Counter(
+    'crawlic_driver_pool_events_total', 'Driver pool events (reuse, launch, retire, health_check_failed)', ['event'])
+FETCHES = Counter(
+    'crawlic_fetches_total', 'Page fetches by tier and outcome', ['tier', 'outcome'])
+PAGE_CACHE_LOOKUPS = Counter(
+    'crawlic_page_cache_lookups_total', 'Page cache lookups by result (hit, miss, bypass)', ['result'])
+SINGLE_FLIGHT = Counter(
+    'crawlic_single_flight_total', 'Page fetches by single-flight role (leader, coalesced, takeover, timeout)', ['role'])
+BLOCKED_REQUESTS = Counter(
+    'crawlic_blocked_requests_total', 'Browser requests cancelled by the block profile', ['resource_type'])
+TRANSFERRED_BYTES = Counter(
+    'crawlic_browser_transferred_bytes_total', 'Bytes downloaded by the browser while rendering pages')
+
+LLM_SECONDS = Histogram(
+    'crawlic_llm_request_seconds', 'Duration of an LLM API call', ['model', 'operation'], buckets=STAGE_BUCKETS)
+LLM_TOKENS = Counter(
+    'crawlic_llm_tokens_total', 'Tokens used by LLM API calls', ['model', 'kind'])
+LLM_CACHE_LOOKUPS = Counter(
+    'crawlic_llm_cache_lookups_total', 'LLM answer cache lookups by result (hit, miss)', ['result'])
+
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    'crawlic_task_queue_wait_seconds', 'Time between publishing a task (or its ETA) and its start',
+    ['task'], buckets=STAGE_BUCKETS)
+TASK_SECONDS = Histogram(
+    'crawlic_task_seconds', 'Duration of a Celery task', ['task'], buckets=STAGE_BUCKETS)
+TASK_OUTCOMES = Counter(
+    'crawlic_task_outcomes_total', 'Finished Celery tasks by outcome (success, error, failure, retry)',
+    ['task', 'outcome'])
+
+# Task payloads and results encoded by the compact serializer (see celery_app.compact_dumps),
+# as JSON would have stored them and as actually stored
+SERIALIZED_BYTES = Counter(
+    'crawlic_serialized_bytes_total', 'Bytes of the encoded task payloads and results', ['form'])
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'crawlic_http_request_seconds', 'Duration of the API requests of the web tier',
+    ['method', 'endpoint', 'status'], buckets=STAGE_BUCKETS)
+
+
+########################################
+# Helpers
+########################################
+
+@contextmanager
+def time_stage(stage: str):
+    """Records the duration of the enclosed block as a pipeline stage, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def timed_stage(stage: str):
+    """Decorator version of time_stage."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with time_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_llm_call(model: str, operation: str, elapsed: float, input_tokens=None, output_tokens=None):
+    """Records the duration and token usage of one LLM API call."""
+    LLM_SECONDS.labels(model=model, operation=operation).observe(elapsed)
+    if input_tokens:
+        LLM_TOKENS.labels(model=model, kind='input').inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(model=model, kind='output').inc(output_tokens)
+
+
+def get_registry():
+    """Registry to export: aggregated over every process in multiprocess mode, else this process."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def export():
+    """
+    RETURNS:
+        Tuple of (payload, content type) in the Prometheus text format.
+    """
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    """Serves the metrics on http://0.0.0.0:<port>/metrics from a background thread."""
+    start_http_server(port, registry=get_registry())
+    print(f"📈 Serving metrics on port {port}")
+
+
+def clear_multiproc_dir():
+    """Removes the values left by the processes of a previous run. Call once, before any child starts."""
+    if MULTIPROC_DIR:
+        for file_name in os.listdir(MULTIPROC_DIR):
+            if file_name.endswith('.db'):
+                os.remove(os.path.join(MULTIPROC_DIR, file_name))
+
+
+def mark_process_dead(pid: int):
+    """Drops the live values of a finished child process in multiprocess mode."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)